@@ -1,19 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Union
+import asyncio
+import hashlib
 import jwt
+import orjson
 import os
+import secrets
+import time
 from jwt.exceptions import PyJWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, APIKeyHeader
 from passlib.context import CryptContext
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from . import models
-from .database import get_db
+from .database import get_db, AsyncSessionLocal
+from .cache import async_redis
 from .config import settings, get_security_settings
 from .monitoring import structured_logger
 
 # Security context for password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Argon2id with the OWASP baseline parameters; bcrypt is kept so existing
+# hashes still verify and are upgraded on the next successful login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1
+)
+
+# argon2-cffi and bcrypt release the GIL, so hashing threads run in parallel
+# across cores; a dedicated pool keeps login bursts from starving other
+# asyncio.to_thread users (Stripe calls, Redis pings)
+hash_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1,
+    thread_name_prefix="password-hash"
+)
+
+# Resolved users are cached per access token so authenticated requests
+# skip the user lookup; the JWT itself is still verified every time
+SESSION_CACHE_TTL = 300  # Seconds, capped by the token's own expiry
+SESSION_CACHE_FIELDS = ("id", "username", "email", "role", "is_active",
+                        "is_mfa_enabled", "stripe_customer_id")
+
+# Built once at import; only the bound username changes per call
+ACTIVE_USER_BY_USERNAME = (
+    select(models.User)
+    .where(models.User.username == bindparam("username"))
+    .where(models.User.is_active == True)
+)
+
+# Audit records are queued by request handlers and written with COPY by
+# flush_audit_logs, one round trip per batch instead of one INSERT per event
+AUDIT_LOG_BATCH_SIZE = 500  # Maximum records per COPY
+AUDIT_LOG_FLUSH_INTERVAL = 0.25  # Seconds to wait for more records before flushing
+AUDIT_LOG_MAX_ATTEMPTS = 3
+AUDIT_LOG_RETRY_DELAY = 1.0  # Seconds, multiplied by the attempt number
+# Batches that still fail are parked here and re-queued when the flusher starts
+AUDIT_LOG_FAILED_KEY = "audit:failed"
+audit_log_queue: asyncio.Queue = asyncio.Queue()
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -29,6 +78,45 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+async def hash_password(password: str) -> str:
+    """Generate password hash on the hashing pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor, get_password_hash, password)
+
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[models.User]:
+    """
+    Authenticate a user by username and password
+    
+    Hash verification is CPU-bound, so it runs on the hashing pool to keep
+    the event loop responsive.
+    
+    Args:
+        db: Database session
+        username: Username to authenticate
+        password: Plain-text password
+        
+    Returns:
+        Optional[models.User]: Authenticated user or None if invalid
+    """
+    result = await db.execute(ACTIVE_USER_BY_USERNAME, {"username": username})
+    user = result.scalars().first()
+    if not user:
+        return None
+    
+    loop = asyncio.get_running_loop()
+    valid, new_hash = await loop.run_in_executor(
+        hash_executor, pwd_context.verify_and_update, password, user.hashed_password
+    )
+    if not valid:
+        return None
+    
+    # Transparently migrate legacy hashes to the current scheme
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
+    return user
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create JWT access token with enhanced security
@@ -55,7 +143,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({
         "exp": expire,
         "iat": datetime.utcnow(),  # Issued at claim
-        "jti": f"{datetime.utcnow().timestamp()}-{os.urandom(8).hex()}"  # JWT ID for uniqueness
+        "jti": to_encode.get("jti") or secrets.token_urlsafe(16)  # JWT ID for uniqueness
     })
     
     # Encode the JWT
@@ -98,6 +186,33 @@ def decode_token(token: str) -> Optional[dict]:
                              error_type=type(e).__name__)
         return None
 
+PASSWORD_RESET_EXPIRE = timedelta(hours=1)  # Shorter expiry for security
+
+async def create_password_reset_token(user: models.User) -> str:
+    """
+    Create a single-use password reset token
+    
+    The token ID is registered in Redis for the token's lifetime and removed
+    by consume_password_reset_token, which makes the token one-time use.
+    """
+    jti = secrets.token_urlsafe(16)
+    token = create_access_token(
+        data={
+            "sub": user.username,
+            "purpose": "password_reset",
+            "email": user.email,  # Include email to prevent token reuse for different email
+            "jti": jti
+        },
+        expires_delta=PASSWORD_RESET_EXPIRE
+    )
+    await async_redis.set(f"auth:reset:{jti}", user.id, nx=True,
+                          ex=int(PASSWORD_RESET_EXPIRE.total_seconds()))
+    return token
+
+async def consume_password_reset_token(jti: str) -> bool:
+    """Atomically claim a reset token ID; False if unknown, expired or already used"""
+    return await async_redis.delete(f"auth:reset:{jti}") == 1
+
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create JWT refresh token with enhanced security
@@ -124,7 +239,7 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
     to_encode.update({
         "exp": expire,
         "iat": datetime.utcnow(),  # Issued at claim
-        "jti": f"{datetime.utcnow().timestamp()}-{os.urandom(8).hex()}",  # JWT ID for uniqueness
+        "jti": secrets.token_urlsafe(16),  # JWT ID for uniqueness
         "token_type": "refresh"  # Mark as refresh token
     })
     
@@ -150,16 +265,33 @@ def create_api_key(db: Session, user: models.User, name: str, expires_in_days: O
     db.refresh(api_key)
     return api_key
 
+def _session_key(payload: dict, token: str) -> str:
+    """Redis key for a cached session, by token ID when the token has one"""
+    jti = payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+    return f"auth:session:{jti}"
+
+async def invalidate_user_sessions(user_id: int) -> None:
+    """Drop all cached sessions for a user after their account data changes"""
+    index_key = f"auth:user_sessions:{user_id}"
+    try:
+        keys = await async_redis.smembers(index_key)
+        await async_redis.delete(index_key, *keys)
+    except Exception as e:
+        structured_logger.log("warning", "Failed to invalidate session cache",
+                             user_id=user_id, error=str(e))
+
 async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme)
 ) -> models.User:
     """
     Get current user from JWT token with enhanced security
     
+    The user is served from the Redis session cache when possible. The
+    returned object is detached and carries only SESSION_CACHE_FIELDS
+    when it comes from the cache.
+    
     Args:
         token: JWT access token
-        db: Database session
         
     Returns:
         models.User: Authenticated user
@@ -190,25 +322,49 @@ async def get_current_user(
         structured_logger.log("warning", "Using refresh token for authentication")
         raise credentials_exception
     
+    cache_key = _session_key(payload, token)
+    try:
+        cached = await async_redis.get(cache_key)
+    except Exception as e:
+        structured_logger.log("warning", "Session cache unavailable", error=str(e))
+        cached = None
+    
+    if cached:
+        data = orjson.loads(cached)
+        data["role"] = models.UserRole(data["role"])
+        return models.User(**data)
+    
     # Get the user from database using constant-time comparison for security
     # The ORM handles this safely under the hood
-    user = (
-        db.query(models.User)
-        .filter(models.User.username == username)
-        .filter(models.User.is_active == True)
-        .first()
-    )
-    
-    if user is None:
-        # Log failed authentication attempt without revealing whether username exists
-        structured_logger.log("warning", "Authentication failed - user not found or inactive")
-        # Use the same exception to prevent user enumeration
-        raise credentials_exception
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(ACTIVE_USER_BY_USERNAME, {"username": username})
+        user = result.scalars().first()
+        
+        if user is None:
+            # Log failed authentication attempt without revealing whether username exists
+            structured_logger.log("warning", "Authentication failed - user not found or inactive")
+            # Use the same exception to prevent user enumeration
+            raise credentials_exception
 
-    # Update last login - only for actual API usage, not token validation
-    # This helps with auditing
-    user.last_login = datetime.utcnow()
-    db.commit()
+        # Update last login - only for actual API usage, not token validation
+        # This helps with auditing; with the session cache it is refreshed
+        # at most once per SESSION_CACHE_TTL per token
+        user.last_login = datetime.utcnow()
+        await db.commit()
+    
+    ttl = min(SESSION_CACHE_TTL, int(payload["exp"] - time.time()))
+    if ttl > 0:
+        index_key = f"auth:user_sessions:{user.id}"
+        try:
+            async with async_redis.pipeline(transaction=False) as pipe:
+                pipe.set(cache_key, orjson.dumps(
+                    {field: getattr(user, field) for field in SESSION_CACHE_FIELDS}
+                ), ex=ttl)
+                pipe.sadd(index_key, cache_key)
+                pipe.expire(index_key, SESSION_CACHE_TTL)
+                await pipe.execute()
+        except Exception as e:
+            structured_logger.log("warning", "Failed to cache session", error=str(e))
     
     # Log successful authentication
     structured_logger.log("info", "User authenticated successfully", 
@@ -290,27 +446,88 @@ def has_research_task_access(
     )
 
 def log_auth_activity(
-    db: Session,
     user: models.User,
     action: str,
     ip_address: Optional[str] = None,
     user_agent: Optional[str] = None,
     details: Optional[str] = None
 ):
-    """Log authentication/authorization activity"""
-    log = models.AuditLog(
-        user_id=user.id,
-        action=action,
-        resource_type="auth",
-        ip_address=ip_address,
-        user_agent=user_agent,
-        details=details
+    """Queue an authentication/authorization audit record; flush_audit_logs writes it"""
+    # The user is the resource for auth events (resource_id is NOT NULL)
+    audit_log_queue.put_nowait(
+        (user.id, action, "auth", user.id, ip_address, user_agent, details)
     )
-    db.add(log)
-    db.commit()
 
     structured_logger.log("info", "Auth activity",
         user_id=user.id,
         action=action,
         ip_address=ip_address
-    )
\ No newline at end of file
+    )
+
+async def _store_audit_batch(rows: list):
+    """COPY a batch of audit records, retrying, then parking it in Redis"""
+    for attempt in range(1, AUDIT_LOG_MAX_ATTEMPTS + 1):
+        try:
+            async with AsyncSessionLocal() as db:
+                await models.AuditLog.bulk_insert(db, rows)
+                await db.commit()
+            return
+        except Exception as e:
+            structured_logger.log("warning", "Failed to store audit log batch",
+                                 error=str(e), count=len(rows), attempt=attempt)
+        if attempt < AUDIT_LOG_MAX_ATTEMPTS:
+            await asyncio.sleep(AUDIT_LOG_RETRY_DELAY * attempt)
+    
+    try:
+        await async_redis.rpush(AUDIT_LOG_FAILED_KEY, *(orjson.dumps(row) for row in rows))
+        structured_logger.log("error", "Parked audit log batch for replay", count=len(rows))
+    except Exception as e:
+        # Last resort: the records survive in the application log
+        structured_logger.log("error", "Dropping audit log batch",
+                             error=str(e), count=len(rows), rows=rows)
+
+async def _requeue_parked_audit_logs():
+    """Queue records parked by an earlier run for another write attempt"""
+    try:
+        async with async_redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(AUDIT_LOG_FAILED_KEY, 0, -1)
+            pipe.delete(AUDIT_LOG_FAILED_KEY)
+            parked, _ = await pipe.execute()
+    except Exception as e:
+        structured_logger.log("error", "Failed to read parked audit logs", error=str(e))
+        return
+    for raw in parked:
+        audit_log_queue.put_nowait(tuple(orjson.loads(raw)))
+
+async def flush_audit_logs():
+    """Drain queued audit records and COPY them in batches
+
+    On cancellation (application shutdown) the records in hand and
+    everything still queued are written before the task exits.
+    """
+    await _requeue_parked_audit_logs()
+    loop = asyncio.get_running_loop()
+    rows = []
+    try:
+        while True:
+            rows = [await audit_log_queue.get()]
+            
+            # Collect whatever else arrives within the flush interval
+            deadline = loop.time() + AUDIT_LOG_FLUSH_INTERVAL
+            while len(rows) < AUDIT_LOG_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    rows.append(await asyncio.wait_for(audit_log_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            await _store_audit_batch(rows)
+            rows = []
+    except asyncio.CancelledError:
+        while not audit_log_queue.empty():
+            rows.append(audit_log_queue.get_nowait())
+        for start in range(0, len(rows), AUDIT_LOG_BATCH_SIZE):
+            await _store_audit_batch(rows[start:start + AUDIT_LOG_BATCH_SIZE])
+        raise
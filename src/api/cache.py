@@ -1,8 +1,12 @@
 import redis
+import redis.asyncio
 from typing import Optional, Any
+import inspect
 import json
 import logging
+import orjson
 from functools import wraps
+from starlette.responses import Response
 import os
 
 logger = logging.getLogger(__name__)
@@ -10,7 +14,7 @@ logger = logging.getLogger(__name__)
 class RedisCache:
     def __init__(self):
         self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        self.client = redis.from_StrictRedis.from_url(self.redis_url)
+        self.client = redis.StrictRedis.from_url(self.redis_url)
         self.default_timeout = 3600  # 1 hour default
 
     def get(self, key: str) -> Optional[Any]:
@@ -53,29 +57,90 @@ class RedisCache:
             return False
 
 # Cache decorator for API endpoints
+_KEY_SCALARS = (str, int, float, bool, type(None))
+
+def _cache_key(name: str, args: tuple, kwargs: dict) -> str:
+    """
+    Build a cache key from the handler's scalar arguments.
+    
+    ORM entities (e.g. the current user) contribute their id; sessions,
+    requests and other injected objects are left out, since their reprs
+    differ on every call and would make the key unique.
+    """
+    parts = [name]
+    for key, value in (*enumerate(args), *sorted(kwargs.items())):
+        if isinstance(value, _KEY_SCALARS):
+            parts.append(f"{key}={value}")
+        elif isinstance(getattr(value, "id", None), int):
+            parts.append(f"{key}.id={value.id}")
+    return ":".join(parts)
+
+def _encode(value: Any) -> Optional[bytes]:
+    """Serialize a handler result once for storage, or None if it cannot be"""
+    if isinstance(value, Response):
+        return None
+    try:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return None
+
 def cache_response(timeout: int = None):
+    """
+    Cache a handler's JSON result in Redis.
+    
+    Hits are returned as the stored bytes in a Response, skipping response
+    model validation and serialization; misses are encoded once with orjson.
+    """
     def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            cache = RedisCache()
-            
-            # Create cache key from function name and arguments
-            cache_key = f"{func.__name__}:{str(args)}:{str(kwargs)}"
-            
-            # Try to get from cache first
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                logger.debug(f"Cache hit for key: {cache_key}")
-                return cached_value
-            
-            # If not in cache, execute function and cache result
-            result = await func(*args, **kwargs)
-            cache.set(cache_key, result, timeout)
-            logger.debug(f"Cache miss for key: {cache_key}")
-            return result
-            
+        ttl = timeout or cache.default_timeout
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                cache_key = _cache_key(func.__name__, args, kwargs)
+                try:
+                    cached_value = await async_redis.get(cache_key)
+                except Exception as e:
+                    logger.error(f"Redis GET error: {str(e)}")
+                    cached_value = None
+                if cached_value is not None:
+                    return Response(content=cached_value, media_type="application/json")
+                
+                result = await func(*args, **kwargs)
+                body = _encode(result)
+                if body is not None:
+                    try:
+                        await async_redis.set(cache_key, body, ex=ttl)
+                    except Exception as e:
+                        logger.error(f"Redis SET error: {str(e)}")
+                return result
+        else:
+            # Sync handlers already run in the threadpool, so the blocking client is fine
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                cache_key = _cache_key(func.__name__, args, kwargs)
+                try:
+                    cached_value = cache.client.get(cache_key)
+                except Exception as e:
+                    logger.error(f"Redis GET error: {str(e)}")
+                    cached_value = None
+                if cached_value is not None:
+                    return Response(content=cached_value, media_type="application/json")
+                
+                result = func(*args, **kwargs)
+                body = _encode(result)
+                if body is not None:
+                    try:
+                        cache.client.set(cache_key, body, ex=ttl)
+                    except Exception as e:
+                        logger.error(f"Redis SET error: {str(e)}")
+                return result
+        
         return wrapper
     return decorator
 
 # Initialize Redis cache
-cache = RedisCache()
\ No newline at end of file
+cache = RedisCache()
+
+# Shared asyncio client for request-path lookups that must not block the loop
+async_redis = redis.asyncio.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
\ No newline at end of file
@@ -2,7 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import NullPool
 from contextlib import contextmanager
 import logging
 from typing import Generator, AsyncGenerator
@@ -11,23 +11,31 @@ from .config import settings, get_db_url
 
 logger = logging.getLogger(__name__)
 
+# Pool sizing: pool_size + max_overflow must exceed the peak number of DB
+# operations in flight per worker, or requests queue for pool_timeout seconds
+# waiting on a connection. The default queue pools are used otherwise; with
+# NullPool, pooling is left to PgBouncer.
+if settings.DATABASE_NULL_POOL:
+    pool_options = {"poolclass": NullPool}
+else:
+    pool_options = {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_pre_ping": True,  # Enable connection health checks
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+    }
+
 # Create engines for both sync and async operations
 engine = create_engine(
     get_db_url(),
-    poolclass=QueuePool,
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    pool_pre_ping=True,  # Enable connection health checks
-    pool_recycle=3600,   # Recycle connections every hour
+    **pool_options,
     echo=settings.DEBUG  # Log SQL statements in debug mode
 )
 
 async_engine = create_async_engine(
     get_db_url().replace('postgresql://', 'postgresql+asyncpg://'),
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    pool_pre_ping=True,
-    pool_recycle=3600,
+    **pool_options,
     echo=settings.DEBUG
 )
 
@@ -42,7 +50,8 @@ AsyncSessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=async_engine,
-    class_=AsyncSession
+    class_=AsyncSession,
+    expire_on_commit=False  # Attribute access after commit must not trigger implicit IO
 )
 
 # Base class for SQLAlchemy models
@@ -68,9 +77,10 @@ def get_db() -> Generator:
 
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Asynchronous database session context manager.
+    Asynchronous database session dependency.
     Usage:
-        async with get_async_db() as db:
+        @app.get("/items")
+        async def list_items(db: AsyncSession = Depends(get_async_db)):
             result = await db.execute(select(Model))
     """
     async with AsyncSessionLocal() as session:
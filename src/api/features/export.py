@@ -62,7 +62,8 @@ class ResearchExporter:
         research_data: Dict[str, Any],
         format: str,
         template: str = "academic",
-        options: Optional[Dict[str, Any]] = None
+        options: Optional[Dict[str, Any]] = None,
+        encode: bool = True
     ) -> Dict[str, Any]:
         """
         Export research in specified format
@@ -72,6 +73,9 @@ class ResearchExporter:
             format: Export format (pdf, docx, txt, json, csv, notion)
             template: Template style
             options: Format-specific options
+            encode: Base64-encode binary formats (pdf, docx, xlsx) into
+                'data'; when False their raw bytes are left in 'content'
+                for the caller to stream
             
         Returns:
             Export result with file data or URL
@@ -96,6 +100,8 @@ class ResearchExporter:
         
         try:
             result = await exporter(research_data, template, options)
+            if encode and 'content' in result:
+                result['data'] = base64.b64encode(result.pop('content')).decode('utf-8')
             
             # Log export
             logger.info(f"Research exported to {format} format")
@@ -246,7 +252,8 @@ class ResearchExporter:
         pdf_data = buffer.getvalue()
         
         return {
-            'data': base64.b64encode(pdf_data).decode('utf-8'),
+            'content': pdf_data,
+            'media_type': 'application/pdf',
             'filename': f"research_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
             'size': len(pdf_data)
         }
@@ -330,7 +337,8 @@ class ResearchExporter:
         docx_data = buffer.getvalue()
         
         return {
-            'data': base64.b64encode(docx_data).decode('utf-8'),
+            'content': docx_data,
+            'media_type': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
             'filename': f"research_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx",
             'size': len(docx_data)
         }
@@ -659,7 +667,8 @@ class ResearchExporter:
         excel_data = buffer.getvalue()
         
         return {
-            'data': base64.b64encode(excel_data).decode('utf-8'),
+            'content': excel_data,
+            'media_type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
             'filename': f"research_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
             'size': len(excel_data)
         }
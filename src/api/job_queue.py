@@ -0,0 +1,161 @@
+"""
+Redis-backed job queues for Parallax Pal API
+
+Jobs survive restarts: a consumer moves each job onto its own processing
+list while it runs and removes it only once the handler has finished.
+Failed jobs wait in a delayed set until their retry is due, so one failing
+job never holds up the rest of the queue. Processing lists of consumers
+whose heartbeat has lapsed (crashed or redeployed workers) are moved back
+onto the queue by the live consumers.
+"""
+
+import asyncio
+import os
+import secrets
+import socket
+import time
+from typing import Any, Awaitable, Callable
+
+import orjson
+
+from .cache import async_redis
+from .monitoring import structured_logger
+
+# Unique per process; a restarted worker never mistakes an old list for its own
+CONSUMER_ID = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+
+POLL_TIMEOUT = 1  # Seconds a consumer blocks waiting for a job
+HEARTBEAT_TTL = 30  # Seconds before a silent consumer's jobs are reclaimed
+HEARTBEAT_INTERVAL = 10
+RECOVERY_INTERVAL = 30  # Seconds between scans for orphaned processing lists
+PROMOTE_BATCH_SIZE = 100
+
+# Move due jobs from the delayed set back onto the queue in one round trip.
+# KEYS: delayed ZSET, queue list
+# ARGV: now
+PROMOTE_DUE_JOBS_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, job in ipairs(due) do
+    redis.call('RPUSH', KEYS[2], job)
+end
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return #due
+"""
+
+
+class DurableQueue:
+    """A named job queue with per-consumer processing lists and delayed retries"""
+
+    def __init__(self, key: str, max_attempts: int, retry_delay: float):
+        """
+        Args:
+            key: Redis key of the pending list; other keys derive from it
+            max_attempts: Handler failures before a job is moved to the failed list
+            retry_delay: Seconds before a retry, multiplied by the attempt number
+        """
+        self.key = key
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.delayed_key = f"{key}:delayed"
+        self.failed_key = f"{key}:failed"  # Kept for manual replay
+        self.processing_key = self._processing_key(CONSUMER_ID)
+        self.heartbeat_key = self._heartbeat_key(CONSUMER_ID)
+        self._promote = async_redis.register_script(PROMOTE_DUE_JOBS_LUA)
+
+    def _processing_key(self, consumer_id: str) -> str:
+        return f"{self.key}:processing:{consumer_id}"
+
+    def _heartbeat_key(self, consumer_id: str) -> str:
+        return f"{self.key}:alive:{consumer_id}"
+
+    async def push(self, payload: Any):
+        """Queue a job; raises if Redis is unavailable, so callers can fail loudly"""
+        await async_redis.rpush(self.key, orjson.dumps({"payload": payload, "attempt": 0}))
+
+    async def consume(self, handler: Callable[[Any], Awaitable[None]]):
+        """Run ``handler`` on each job until cancelled; exceptions trigger a retry"""
+        last_heartbeat = last_recovery = 0.0
+        while True:
+            try:
+                now = time.monotonic()
+                if now - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    await async_redis.set(self.heartbeat_key, 1, ex=HEARTBEAT_TTL)
+                    last_heartbeat = now
+                if now - last_recovery >= RECOVERY_INTERVAL:
+                    await self._recover_orphans()
+                    last_recovery = now
+                await self._promote(
+                    keys=[self.delayed_key, self.key], args=[time.time(), PROMOTE_BATCH_SIZE]
+                )
+                raw = await async_redis.blmove(
+                    self.key, self.processing_key, POLL_TIMEOUT, "LEFT", "RIGHT"
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                structured_logger.log("error", "Failed to read job queue",
+                                     queue=self.key, error=str(e))
+                await asyncio.sleep(POLL_TIMEOUT)
+                continue
+            if raw is None:
+                continue
+
+            try:
+                job = orjson.loads(raw)
+                payload = job["payload"]
+            except Exception as e:
+                structured_logger.log("error", "Parking malformed job",
+                                     queue=self.key, error_type=type(e).__name__)
+                await self._settle(raw, self.failed_key, raw)
+                continue
+
+            try:
+                await handler(payload)
+            except asyncio.CancelledError:
+                # Left on the processing list; reclaimed once the heartbeat lapses
+                raise
+            except Exception as e:
+                # Only the error type: messages may contain addresses or tokens
+                job["attempt"] += 1
+                if job["attempt"] >= self.max_attempts:
+                    structured_logger.log("error", "Giving up on queued job",
+                                         queue=self.key, attempt=job["attempt"],
+                                         error_type=type(e).__name__)
+                    await self._settle(raw, self.failed_key, orjson.dumps(job))
+                else:
+                    structured_logger.log("warning", "Queued job failed, retrying",
+                                         queue=self.key, attempt=job["attempt"],
+                                         error_type=type(e).__name__)
+                    due = time.time() + self.retry_delay * job["attempt"]
+                    await self._settle(raw, self.delayed_key, orjson.dumps(job), due)
+                continue
+
+            await async_redis.lrem(self.processing_key, 1, raw)
+
+    async def _settle(self, raw, target_key: str, value, due: float = None):
+        """Atomically drop a job from processing and file it under ``target_key``"""
+        async with async_redis.pipeline(transaction=True) as pipe:
+            if due is None:
+                pipe.rpush(target_key, value)
+            else:
+                pipe.zadd(target_key, {value: due})
+            pipe.lrem(self.processing_key, 1, raw)
+            await pipe.execute()
+
+    async def _recover_orphans(self):
+        """Re-queue jobs held by consumers whose heartbeat has expired"""
+        prefix = self._processing_key("")
+        async for key in async_redis.scan_iter(match=f"{prefix}*"):
+            consumer_id = (key.decode() if isinstance(key, bytes) else key)[len(prefix):]
+            if consumer_id == CONSUMER_ID:
+                continue
+            if await async_redis.exists(self._heartbeat_key(consumer_id)):
+                continue
+            moved = 0
+            while await async_redis.lmove(key, self.key, "RIGHT", "LEFT"):
+                moved += 1
+            if moved:
+                structured_logger.log("warning", "Re-queued jobs from a stopped consumer",
+                                     queue=self.key, consumer=consumer_id, count=moved)
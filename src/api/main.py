@@ -1,23 +1,41 @@
+import asyncio
+import base64
+import functools
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Union
-from fastapi import FastAPI, Depends, HTTPException, status, BackgroundTasks, Request, Header
-from fastapi.middleware.cors import CORSMiddleware
+from typing import List, Optional, Dict, Any, Union, Callable
+from fastapi import FastAPI, Depends, HTTPException, status, BackgroundTasks, Request, Header, Query
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session, selectinload
+from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy import bindparam, case, delete, func, insert, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, raiseload, selectinload
+import gzip
+import hashlib
+import httpx
+import orjson
 import pyotp
+import secrets
 import stripe
 import os
-from pydantic import BaseModel, EmailStr, constr, validator
+import threading
+import time
+import traceback
+import types
+from pydantic import BaseModel, ConfigDict, EmailStr, constr, validator
 
 from . import models, auth
-from .database import get_db, init_db
+from .database import get_db, get_async_db, init_db, AsyncSessionLocal
 from .research import research_service
 from .routers import subscription
-from .cache import cache, cache_response
+from .cache import async_redis
+from .job_queue import DurableQueue
 from .monitoring import setup_monitoring, monitor_endpoint, StructuredLogger
 from .config import settings
+from .middleware import FrozenOriginCORSMiddleware
 from .services.email import EmailService
 
 # Add ADK router import
@@ -31,6 +49,13 @@ from .monitoring.monitoring_middleware import setup_request_monitoring
 # Configure Stripe
 stripe.api_key = settings["stripe"]["secret_key"]
 stripe.api_version = "2023-10-16"  # Use latest stable version
+# One shared client so worker threads reuse keep-alive connections to Stripe
+stripe.default_http_client = stripe.http_client.RequestsClient(verify_ssl_certs=True)
+STRIPE_WEBHOOK_SECRET = settings["stripe"]["webhook_secret"]
+
+# Token lifetimes, fixed for the life of the process
+ACCESS_TOKEN_EXPIRE = timedelta(minutes=settings['security']['access_token_expire_minutes'])
+REFRESH_TOKEN_EXPIRE = timedelta(days=settings['security']['refresh_token_expire_days'])
 
 # Pydantic models for payment/subscription
 class SubscriptionPlanCreate(BaseModel):
@@ -58,6 +83,53 @@ class WebhookEvent(BaseModel):
     type: str
     data: Dict[str, Any]
 
+# Response models; from_attributes lets them read ORM objects and row mappings
+class PlanOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    description: Optional[str] = None
+    price: float
+    interval: str
+    features: Optional[Dict[str, Any]] = None
+    allows_ollama: Optional[bool] = None
+
+class SubscriptionOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    plan: PlanOut
+    status: models.SubscriptionStatus
+    current_period_end: Optional[datetime] = None
+    cancel_at_period_end: Optional[bool] = None
+
+class SubscriptionStatusOut(BaseModel):
+    has_subscription: bool
+    subscription: Optional[SubscriptionOut] = None
+
+class PaymentMethodOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    stripe_payment_method_id: str
+    type: str
+    last4: Optional[str] = None
+    exp_month: Optional[int] = None
+    exp_year: Optional[int] = None
+    is_default: bool
+    created_at: Optional[datetime] = None
+
+class ResearchTaskSummary(BaseModel):
+    id: int
+    query: str
+    status: models.ResearchStatus
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+class AdminResearchTaskSummary(ResearchTaskSummary):
+    owner_id: int
+
 # Initialize FastAPI app with enhanced metadata
 app = FastAPI(
     title="Parallax Pal API",
@@ -73,8 +145,11 @@ app = FastAPI(
     * ADK-based agent system integration
     """,
     version="1.0.0",
-    docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    default_response_class=ORJSONResponse,
+    # Schema and docs are served from the precomputed routes at the bottom
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None
 )
 
 # Include routers
@@ -115,13 +190,14 @@ elif not allowed_origins:
 
 # Configure CORS middleware with specific allowed methods and headers
 app.add_middleware(
-    CORSMiddleware,
+    FrozenOriginCORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
+    allow_methods=["GET", "POST", "DELETE"],  # The only verbs the API routes use
     allow_headers=["Authorization", "Content-Type", "X-API-Key", "Accept"],
     expose_headers=["Content-Disposition"],
-    max_age=600  # Cache preflight requests for 10 minutes
+    # Browsers cap this themselves (Chromium at 2h); keep it short in development
+    max_age=600 if settings.get('environment') == 'development' else 86400
 )
 
 # Import WebSocket implementation
@@ -133,6 +209,84 @@ from .websocket_adk import adk_websocket_manager
 ADK_ENABLED = os.getenv("ADK_ENABLED", "false").lower() == "true"
 ADK_BASE_URL = os.getenv("ADK_ORCHESTRATOR_URL", "http://localhost:8080")
 
+# Refresh token housekeeping
+REFRESH_TOKEN_RETENTION = timedelta(days=7)  # Keep expired tokens briefly for auditing
+REFRESH_TOKEN_PURGE_INTERVAL = 3600  # Seconds between purge runs
+AUDIT_LOG_PARTITION_MONTHS_AHEAD = 3  # Monthly audit_logs partitions kept ready
+AUDIT_LOG_PARTITION_INTERVAL = 86400  # Seconds between partition checks
+
+# Stripe webhook limits; verified events are handed to a Redis-backed queue
+WEBHOOK_MAX_BODY_SIZE = 64 * 1024  # Bytes; Stripe event payloads stay well below this
+stripe_event_queue = DurableQueue("queue:stripe_events", max_attempts=5, retry_delay=5)
+
+# Transactional emails are queued in Redis so pending sends survive restarts
+email_queue = DurableQueue("queue:email", max_attempts=5, retry_delay=5)
+EMAIL_JOBS = {
+    "verification": EmailService.send_verification_email,
+    "password_reset": EmailService.send_password_reset_email,
+}
+
+# Long-running background tasks started at startup
+background_tasks = set()
+
+async def purge_expired_refresh_tokens():
+    """Periodically bulk-delete refresh tokens expired past the retention window"""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    delete(models.RefreshToken)
+                    .where(models.RefreshToken.expires_at < func.now() - REFRESH_TOKEN_RETENTION)
+                )
+                await db.commit()
+            structured_logger.log("info", "Purged expired refresh tokens", deleted=result.rowcount)
+        except Exception as e:
+            structured_logger.log("error", "Failed to purge expired refresh tokens", error=str(e))
+        
+        await asyncio.sleep(REFRESH_TOKEN_PURGE_INTERVAL)
+
+async def maintain_audit_log_partitions():
+    """Periodically create upcoming monthly audit_logs partitions
+
+    Rows for a month without a partition land in audit_logs_default, which
+    would then block creating that month's partition, so months are created
+    well ahead. Retention is DETACH PARTITION + DROP TABLE on old months.
+    """
+    while True:
+        try:
+            month = datetime.utcnow().date().replace(day=1)
+            async with AsyncSessionLocal() as db:
+                for _ in range(AUDIT_LOG_PARTITION_MONTHS_AHEAD + 1):
+                    following = (month + timedelta(days=32)).replace(day=1)
+                    await db.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS audit_logs_{month:%Y_%m} "
+                        f"PARTITION OF audit_logs FOR VALUES FROM ('{month}') TO ('{following}')"
+                    ))
+                    month = following
+                await db.commit()
+        except Exception as e:
+            structured_logger.log("error", "Failed to create audit log partitions", error=str(e))
+        
+        await asyncio.sleep(AUDIT_LOG_PARTITION_INTERVAL)
+
+async def enqueue_email(kind: str, *args):
+    """Queue an email for the consumer task; ``kind`` is a key of EMAIL_JOBS"""
+    await email_queue.push({"kind": kind, "args": args})
+
+async def send_queued_email(job: dict):
+    """email_queue handler; raising schedules a retry"""
+    await EMAIL_JOBS[job["kind"]](*job["args"])
+    structured_logger.log("info", "Queued email sent", kind=job["kind"])
+
+async def apply_queued_stripe_event(event: dict):
+    """stripe_event_queue handler; raising schedules a retry"""
+    try:
+        await process_stripe_event(event["id"], event["type"], event["data"]["object"])
+    except Exception as e:
+        structured_logger.log("warning", "Failed to apply Stripe event",
+                             event_id=event["id"], event_type=event["type"], error=str(e))
+        raise
+
 # Startup Events
 @app.on_event("startup")
 async def startup_event():
@@ -153,9 +307,75 @@ async def startup_event():
             structured_logger.log("error", "Failed to initialize ADK WebSocket manager", 
                                  error=str(e))
     
+    # Start refresh token cleanup
+    task = asyncio.create_task(purge_expired_refresh_tokens())
+    background_tasks.add(task)
+    
+    # Keep monthly audit log partitions ahead of the calendar
+    task = asyncio.create_task(maintain_audit_log_partitions())
+    background_tasks.add(task)
+    
+    # Start batched audit log persistence
+    task = asyncio.create_task(auth.flush_audit_logs())
+    background_tasks.add(task)
+    
+    # Start the Stripe event consumer
+    task = asyncio.create_task(stripe_event_queue.consume(apply_queued_stripe_event))
+    background_tasks.add(task)
+    
+    # Start the email queue consumer
+    task = asyncio.create_task(email_queue.consume(send_queued_email))
+    background_tasks.add(task)
+    
+    # Shared outbound HTTP client so probes reuse keep-alive connections
+    app.state.http = httpx.AsyncClient(timeout=2)
+    
     # Log successful startup
     structured_logger.log("info", "Application started successfully")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Cancel background tasks and close shared clients on shutdown"""
+    # Cancelling the audit log flusher makes it write out everything still
+    # queued; gather waits for that before the process exits
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    await app.state.http.aclose()
+
+# Statements for the hot token and plan endpoints, built once at import;
+# values are bound per call so SQLAlchemy's compiled cache always hits
+VALID_REFRESH_TOKEN = (
+    select(models.RefreshToken)
+    .where(models.RefreshToken.token == bindparam("token"))
+    .where(models.RefreshToken.user_id == bindparam("user_id"))
+    .where(models.RefreshToken.expires_at > bindparam("now"))
+)
+ACTIVE_PLANS = (
+    select(models.SubscriptionPlan)
+    .where(models.SubscriptionPlan.is_active == True)
+    .order_by(models.SubscriptionPlan.price.asc())
+)
+# Encoded plan list in Redis; invalidated explicitly when plans change
+PLANS_CACHE_KEY = "subs:plans:v1"
+PLANS_ETAG_KEY = "subs:plans:v1:etag"
+PLANS_CACHE_TTL = 3600
+PLANS_CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=60"
+PLAN_FIELDS = ("id", "name", "description", "price", "interval", "stripe_price_id",
+               "features", "is_active", "allows_ollama", "created_at", "updated_at")
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check: a comma-separated list, weak comparison, or *"""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
 class UserCreate(BaseModel):
     email: str
     username: str
@@ -171,7 +391,7 @@ class UserCreate(BaseModel):
 async def login(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     user = await auth.authenticate_user(db, form_data.username, form_data.password)
     if not user:
@@ -183,26 +403,23 @@ async def login(
         )
     
     # Create access token with appropriate expiration
-    access_token_expires = timedelta(minutes=settings['security']['access_token_expire_minutes'])
     access_token = auth.create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username}, expires_delta=ACCESS_TOKEN_EXPIRE
     )
     
     # Create refresh token with appropriate expiration
-    refresh_token_expires = timedelta(days=settings['security']['refresh_token_expire_days'])
     refresh_token = auth.create_refresh_token(
-        data={"sub": user.username}, expires_delta=refresh_token_expires
+        data={"sub": user.username}, expires_delta=REFRESH_TOKEN_EXPIRE
     )
     
     # Store refresh token in database
     db_refresh_token = models.RefreshToken(
         token=refresh_token,
         user_id=user.id,
-        expires_at=datetime.utcnow() + timedelta(days=settings['security']['refresh_token_expire_days'])
+        expires_at=datetime.utcnow() + REFRESH_TOKEN_EXPIRE
     )
     db.add(db_refresh_token)
-    db.commit()
-    db.refresh(db_refresh_token)
+    await db.commit()
 
     structured_logger.log("info", "Successful login", username=user.username)
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
@@ -211,15 +428,18 @@ async def login(
     tags=["authentication"],
     summary="Register a new user",
     description="Create a new user account")
-async def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_password = auth.get_password_hash(user.password)
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    hashed_password = await auth.hash_password(user.password)
     new_user = models.User(email=user.email, username=user.username, hashed_password=hashed_password)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    # The unique indexes on email and username do the duplicate check
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if "email" in str(e.orig):
+            raise HTTPException(status_code=400, detail="Email already registered")
+        raise HTTPException(status_code=400, detail="Username already taken")
     
     # Generate verification token with purpose claim for extra security
     verification_token = auth.create_access_token(
@@ -231,15 +451,15 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         expires_delta=timedelta(hours=24)
     )
     
-    # Send verification email
-    await send_verification_email(new_user.email, verification_token)
+    # Queue the verification email; the consumer task sends it
+    await enqueue_email("verification", new_user.email, verification_token)
     
     return {"message": "Registration successful. Please check your email to verify your account."}
 
 @app.get("/verify", tags=["authentication"],
     summary="Verify user account",
     description="Verify user account using the verification token")
-async def verify(token: str, db: Session = Depends(get_db)):
+async def verify(token: str, tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
     """
     Verify user account using email verification token
     
@@ -272,7 +492,8 @@ async def verify(token: str, db: Session = Depends(get_db)):
         raise invalid_token_exception
     
     # Use ORM's constant-time comparison to find the user
-    user = db.query(models.User).filter(models.User.username == username).first()
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    user = result.scalars().first()
     if not user:
         # Don't reveal that user doesn't exist
         structured_logger.log("warning", "User not found during verification")
@@ -285,30 +506,35 @@ async def verify(token: str, db: Session = Depends(get_db)):
     # Update user and log activity
     user.is_active = True
     user.verified_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
     
     structured_logger.log("info", "User account verified", user_id=user.id)
     
-    # Send welcome email
-    try:
-        await EmailService.send_welcome_email(user.email, user.username)
-    except Exception as e:
-        # Log error but continue - welcome email is not critical
-        logger.error(f"Error sending welcome email: {str(e)}")
+    # Send welcome email after the response goes out
+    tasks.add_task(send_notification_email, EmailService.send_welcome_email,
+                   "welcome", user.id, user.email, user.username)
+    
+    # Take the Stripe customer round-trip off the checkout path
+    if not user.stripe_customer_id:
+        tasks.add_task(precreate_stripe_customer, user.id, user.email)
     
     return {"message": "Account verified successfully"}
 
 @app.post("/generate_mfa_secret", tags=["authentication"],
     summary="Generate MFA secret",
     description="Generate a new MFA secret for the user")
-async def generate_mfa_secret(db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
+async def generate_mfa_secret(db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(auth.get_current_user)):
     # Generate new MFA secret
-    totp = pyotp.TOTP(pyotp.random_base32())
-    secret = totp.secret()
+    secret = pyotp.random_base32()
 
     # Store secret in database
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == current_user.id)
+        .values(mfa_secret=secret)
+    )
+    await db.commit()
     current_user.mfa_secret = secret
-    db.commit()
 
     # Return secret
     return {"secret": secret}
@@ -316,14 +542,18 @@ async def generate_mfa_secret(db: Session = Depends(get_db), current_user: model
 @app.post("/verify_mfa", tags=["authentication"],
     summary="Verify MFA code",
     description="Verify the MFA code provided by the user")
-async def verify_mfa(code: str, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
-    if not current_user.mfa_secret:
+async def verify_mfa(code: str, db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(auth.get_current_user)):
+    # The MFA secret is deliberately not part of the cached session
+    mfa_secret = await db.scalar(
+        select(models.User.mfa_secret).where(models.User.id == current_user.id)
+    )
+    if not mfa_secret:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="MFA not set up for this user"
         )
     
-    totp = pyotp.TOTP(current_user.mfa_secret)
+    totp = pyotp.TOTP(mfa_secret)
     if not totp.verify(code):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -339,7 +569,7 @@ async def verify_mfa(code: str, db: Session = Depends(get_db), current_user: mod
     description="Use refresh token to obtain a new JWT access token")
 async def refresh_token(
     refresh_token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     payload = auth.decode_token(refresh_token)
     if not payload:
@@ -357,12 +587,8 @@ async def refresh_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = (
-        db.query(models.User)
-        .filter(models.User.username == username)
-        .filter(models.User.is_active == True)
-        .first()
-    )
+    result = await db.execute(auth.ACTIVE_USER_BY_USERNAME, {"username": username})
+    user = result.scalars().first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -371,13 +597,12 @@ async def refresh_token(
         )
 
     # Check if refresh token exists and is valid
-    db_refresh_token = (
-        db.query(models.RefreshToken)
-        .filter(models.RefreshToken.token == refresh_token)
-        .filter(models.RefreshToken.user_id == user.id)
-        .filter(models.RefreshToken.expires_at > datetime.utcnow())
-        .first()
-    )
+    result = await db.execute(VALID_REFRESH_TOKEN, {
+        "token": refresh_token,
+        "user_id": user.id,
+        "now": datetime.utcnow()
+    })
+    db_refresh_token = result.scalars().first()
     if not db_refresh_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -386,62 +611,103 @@ async def refresh_token(
         )
 
     # Create new access token
-    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(data={"sub": user.username}, expires_delta=access_token_expires)
+    access_token = auth.create_access_token(data={"sub": user.username}, expires_delta=ACCESS_TOKEN_EXPIRE)
 
     # Rotate refresh token
-    new_refresh_token = auth.create_refresh_token(data={"sub": user.username})
+    new_refresh_token = auth.create_refresh_token(
+        data={"sub": user.username}, expires_delta=REFRESH_TOKEN_EXPIRE
+    )
     db_new_refresh_token = models.RefreshToken(
         token=new_refresh_token,
         user_id=user.id,
-        expires_at=datetime.utcnow() + timedelta(days=settings['security']['refresh_token_expire_days'])
+        expires_at=datetime.utcnow() + REFRESH_TOKEN_EXPIRE
     )
     db.add(db_new_refresh_token)
-    db.commit()
-    db.refresh(db_new_refresh_token)
+    # Flush to get the new token's primary key, then rotate in one commit
+    await db.flush()
 
     # Invalidate old refresh token
     db_refresh_token.replaced_by = db_new_refresh_token.id
-    db.commit()
+    await db.commit()
 
     return {"access_token": access_token, "refresh_token": new_refresh_token, "token_type": "bearer"}
 
 @app.post("/reset_password_request", tags=["authentication"],
     summary="Request password reset",
     description="Request a password reset link to be sent to the user's email address")
-async def reset_password_request(email: str, db: Session = Depends(get_db), request: Request = None):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def reset_password_request(email: str, db: AsyncSession = Depends(get_async_db), request: Request = None):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
-    # Generate reset token with purpose claim for extra security
-    reset_token = auth.create_access_token(
-        data={
-            "sub": user.username,
-            "purpose": "password_reset",
-            "email": user.email,  # Include email to prevent token reuse for different email
-            "jti": f"{datetime.utcnow().timestamp()}-{os.urandom(8).hex()}"  # Unique ID for one-time use
-        },
-        expires_delta=timedelta(hours=1)  # Shorter expiry for security
-    )
+    # Generate single-use reset token with purpose claim for extra security
+    reset_token = await auth.create_password_reset_token(user)
 
     # Record reset request in audit log
     auth.log_auth_activity(
-        db=db,
         user=user,
         action="password_reset_requested",
         ip_address=request.client.host if request else None,
         details="Password reset email sent"
     )
 
-    # Send reset email
-    await send_reset_email(email, reset_token)
+    # Queue the reset email; the consumer task sends it
+    await enqueue_email("password_reset", email, reset_token)
 
     return {"message": "Password reset link sent to your email address"}
 
+class PasswordReset(BaseModel):
+    token: str
+    new_password: str
+
+@app.post("/reset_password", tags=["authentication"],
+    summary="Reset password",
+    description="Set a new password using a password reset token")
+async def reset_password(reset: PasswordReset, db: AsyncSession = Depends(get_async_db)):
+    # Use a generic error message to prevent information disclosure
+    invalid_token_exception = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid or expired reset token"
+    )
+    
+    payload = auth.decode_token(reset.token)
+    if not payload or payload.get("purpose") != "password_reset" or not payload.get("jti"):
+        raise invalid_token_exception
+    
+    # Deleting the Redis key is what makes the token single-use
+    if not await auth.consume_password_reset_token(payload["jti"]):
+        structured_logger.log("warning", "Reused or unknown password reset token")
+        raise invalid_token_exception
+    
+    result = await db.execute(
+        select(models.User)
+        .where(models.User.username == payload.get("sub"))
+        .where(models.User.email == payload.get("email"))
+    )
+    user = result.scalars().first()
+    if not user:
+        raise invalid_token_exception
+    
+    user.hashed_password = await auth.hash_password(reset.new_password)
+    
+    # Revoke outstanding refresh tokens along with the password change
+    now = datetime.utcnow()
+    await db.execute(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.user_id == user.id)
+        .where(models.RefreshToken.expires_at > now)
+        .values(expires_at=now)
+    )
+    await db.commit()
+    await auth.invalidate_user_sessions(user.id)
+    
+    structured_logger.log("info", "Password reset completed", user_id=user.id)
+    return {"message": "Password has been reset"}
+
 # Payment and Subscription Endpoints
 @app.post("/api/subscription/plans",
     response_model=Dict[str, Any],
@@ -451,7 +717,7 @@ async def reset_password_request(email: str, db: Session = Depends(get_db), requ
 @monitor_endpoint("create_subscription_plan")
 async def create_subscription_plan(
     plan: SubscriptionPlanCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.check_admin_role)
 ):
     # Create Stripe product and price
@@ -478,8 +744,8 @@ async def create_subscription_plan(
         features=plan.features
     )
     db.add(db_plan)
-    db.commit()
-    db.refresh(db_plan)
+    await db.commit()
+    await async_redis.delete(PLANS_CACHE_KEY, PLANS_ETAG_KEY)
     
     return db_plan
 
@@ -489,21 +755,36 @@ async def create_subscription_plan(
     summary="List subscription plans",
     description="Get list of available subscription plans")
 @monitor_endpoint("list_subscription_plans")
-@cache_response(timeout=300)  # Cache for 5 minutes
 async def list_subscription_plans(
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Optimized query that selects only needed columns and adds ordering for consistency
-    plans = db.query(models.SubscriptionPlan)\
-        .filter(models.SubscriptionPlan.is_active == True)\
-        .order_by(models.SubscriptionPlan.price.asc())\
-        .all()
-    
-    # Note: We're not selecting specific columns because the response_model needs the full object
-    # In a real optimization, we'd create a specific Pydantic model for the response
-    # that only includes the fields we need to return
+    # Served as pre-encoded JSON; create_subscription_plan drops the keys.
+    # Redis is only a cache here: if it is down, the list is built from the DB.
+    try:
+        body, etag = await async_redis.mget(PLANS_CACHE_KEY, PLANS_ETAG_KEY)
+    except Exception as e:
+        structured_logger.log("warning", "Plan cache read failed", error=str(e))
+        body = etag = None
+    if body is None or etag is None:
+        result = await db.execute(ACTIVE_PLANS)
+        body = orjson.dumps([
+            {field: getattr(plan, field) for field in PLAN_FIELDS}
+            for plan in result.scalars().all()
+        ])
+        etag = ('"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"').encode()
+        try:
+            async with async_redis.pipeline(transaction=False) as pipe:
+                pipe.set(PLANS_CACHE_KEY, body, ex=PLANS_CACHE_TTL)
+                pipe.set(PLANS_ETAG_KEY, etag, ex=PLANS_CACHE_TTL)
+                await pipe.execute()
+        except Exception as e:
+            structured_logger.log("warning", "Plan cache write failed", error=str(e))
     
-    return plans
+    headers = {"ETag": etag.decode(), "Cache-Control": PLANS_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.post("/api/subscription/checkout",
     response_model=Dict[str, str],
@@ -513,27 +794,27 @@ async def list_subscription_plans(
 @monitor_endpoint("create_checkout_session")
 async def create_checkout_session(
     plan_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    plan = db.query(models.SubscriptionPlan)\
-        .filter(models.SubscriptionPlan.id == plan_id)\
-        .filter(models.SubscriptionPlan.is_active == True)\
-        .first()
+    result = await db.execute(
+        select(models.SubscriptionPlan)
+        .where(models.SubscriptionPlan.id == plan_id)
+        .where(models.SubscriptionPlan.is_active == True)
+    )
+    plan = result.scalars().first()
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
 
-    # Create or get Stripe customer
+    # Normally created in the background at verification; fall back here
     if not current_user.stripe_customer_id:
-        customer = stripe.Customer.create(
-            email=current_user.email,
-            metadata={"user_id": current_user.id}
+        current_user.stripe_customer_id = await ensure_stripe_customer(
+            current_user.id, current_user.email
         )
-        current_user.stripe_customer_id = customer.id
-        db.commit()
     
-    # Create checkout session
-    session = stripe.checkout.Session.create(
+    # Create checkout session; the Stripe SDK is blocking, so run it in a thread
+    session = await asyncio.to_thread(
+        stripe.checkout.Session.create,
         customer=current_user.stripe_customer_id,
         payment_method_types=['card'],
         line_items=[{
@@ -551,68 +832,156 @@ async def create_checkout_session(
     
     return {"session_id": session.id}
 
+async def ensure_stripe_customer(user_id: int, email: str) -> str:
+    """Create and store a Stripe customer for the user, returning the stored ID"""
+    customer = await asyncio.to_thread(
+        stripe.Customer.create,
+        email=email,
+        metadata={"user_id": user_id}
+    )
+    async with AsyncSessionLocal() as db:
+        # Only fill an empty slot so a concurrent creation cannot be overwritten
+        stored = await db.scalar(
+            update(models.User)
+            .where(models.User.id == user_id)
+            .where(models.User.stripe_customer_id.is_(None))
+            .values(stripe_customer_id=customer.id)
+            .returning(models.User.stripe_customer_id)
+        )
+        await db.commit()
+        if stored is None:
+            stored = await db.scalar(
+                select(models.User.stripe_customer_id).where(models.User.id == user_id)
+            )
+            await asyncio.to_thread(stripe.Customer.delete, customer.id)
+            return stored
+    
+    await auth.invalidate_user_sessions(user_id)
+    return stored
+
+async def precreate_stripe_customer(user_id: int, email: str):
+    """Background task: set up the Stripe customer before the first checkout"""
+    try:
+        await ensure_stripe_customer(user_id, email)
+    except Exception as e:
+        structured_logger.log("error", "Failed to pre-create Stripe customer",
+                             error=str(e), user_id=user_id)
+
+async def process_stripe_event(event_id: str, event_type: str, data: dict):
+    """Apply a verified Stripe event once, skipping redeliveries
+
+    Raises on failure; the claim is rolled back with the rest of the
+    transaction so the queued job can be retried.
+    """
+    async with AsyncSessionLocal() as db:
+        # Claim the event first; the marker commits together with the updates
+        claimed = await db.scalar(
+            pg_insert(models.ProcessedEvent)
+            .values(id=event_id, type=event_type)
+            .on_conflict_do_nothing(index_elements=["id"])
+            .returning(models.ProcessedEvent.id)
+        )
+        if claimed is None:
+            structured_logger.log("info", "Skipping already processed Stripe event",
+                                 event_id=event_id, event_type=event_type)
+            return
+        
+        user_ids = []
+        if event_type == "checkout.session.completed":
+            metadata = data.get("metadata") or {}
+            subscription = data["subscription"]
+            # Checkout sessions carry the subscription ID unless it was expanded
+            if isinstance(subscription, str):
+                subscription = await asyncio.to_thread(stripe.Subscription.retrieve, subscription)
+            
+            # Stored in the same transaction as the event marker, so a failed
+            # insert rolls the claim back and Stripe's redelivery retries it
+            user_id = int(metadata["user_id"])
+            await db.execute(
+                pg_insert(models.Subscription)
+                .values(
+                    user_id=user_id,
+                    plan_id=int(metadata["plan_id"]),
+                    stripe_subscription_id=subscription["id"],
+                    status=models.SubscriptionStatus.ACTIVE,
+                    current_period_start=datetime.fromtimestamp(subscription["current_period_start"]),
+                    current_period_end=datetime.fromtimestamp(subscription["current_period_end"])
+                )
+                .on_conflict_do_nothing(index_elements=["stripe_subscription_id"])
+            )
+            user_ids = [user_id]
+        
+        elif event_type == "customer.subscription.updated":
+            affected = await db.scalars(
+                update(models.Subscription)
+                .where(models.Subscription.stripe_subscription_id == data["id"])
+                .values(
+                    status=data["status"],
+                    current_period_end=datetime.fromtimestamp(data["current_period_end"]),
+                    cancel_at_period_end=data["cancel_at_period_end"]
+                )
+                .returning(models.Subscription.user_id)
+            )
+            user_ids = affected.all()
+        
+        elif event_type == "customer.subscription.deleted":
+            affected = await db.scalars(
+                update(models.Subscription)
+                .where(models.Subscription.stripe_subscription_id == data["id"])
+                .values(
+                    status=models.SubscriptionStatus.CANCELED,
+                    canceled_at=datetime.now()
+                )
+                .returning(models.Subscription.user_id)
+            )
+            user_ids = affected.all()
+        
+        await db.commit()
+    
+    if user_ids:
+        await invalidate_subscription_cache(*user_ids)
+
 @app.post("/api/subscription/webhook",
     tags=["subscription"],
     summary="Stripe webhook handler",
     description="Handle Stripe webhook events")
 async def stripe_webhook(
     request: Request,
-    stripe_signature: str = Header(...),
-    db: Session = Depends(get_db)
+    stripe_signature: str = Header(...)
 ):
-    # Get raw request body
-    payload = await request.body()
+    # Stripe payloads are small; refuse anything larger before buffering it
+    content_length = request.headers.get("content-length")
+    if content_length is not None and (
+        not content_length.isdigit() or int(content_length) > WEBHOOK_MAX_BODY_SIZE
+    ):
+        raise HTTPException(status_code=413, detail="Payload too large")
+    
+    # Read the raw body, enforcing the cap for chunked uploads as well
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > WEBHOOK_MAX_BODY_SIZE:
+            raise HTTPException(status_code=413, detail="Payload too large")
+        chunks.append(chunk)
+    payload = b"".join(chunks)
     
     try:
-        # Verify webhook signature
-        event = stripe.Webhook.construct_event(
-            payload,
+        # Verify the signature only; the SDK's StripeObject wrapping is skipped
+        stripe.WebhookSignature.verify_header(
+            payload.decode("utf-8"),
             stripe_signature,
-            settings["stripe"]["webhook_secret"]
+            STRIPE_WEBHOOK_SECRET
         )
+        event = orjson.loads(payload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    # Handle the event
-    if event.type == "checkout.session.completed":
-        session = event.data.object
-        user_id = session.metadata.get("user_id")
-        plan_id = session.metadata.get("plan_id")
-        
-        # Create subscription record
-        subscription = models.Subscription(
-            user_id=user_id,
-            plan_id=plan_id,
-            stripe_subscription_id=session.subscription,
-            status=models.SubscriptionStatus.ACTIVE,
-            current_period_start=datetime.fromtimestamp(session.subscription.current_period_start),
-            current_period_end=datetime.fromtimestamp(session.subscription.current_period_end)
-        )
-        db.add(subscription)
-        db.commit()
-    
-    elif event.type == "customer.subscription.updated":
-        subscription = event.data.object
-        db_subscription = db.query(models.Subscription)\
-            .filter(models.Subscription.stripe_subscription_id == subscription.id)\
-            .first()
-        if db_subscription:
-            db_subscription.status = subscription.status
-            db_subscription.current_period_end = datetime.fromtimestamp(subscription.current_period_end)
-            db_subscription.cancel_at_period_end = subscription.cancel_at_period_end
-            db.commit()
-    
-    elif event.type == "customer.subscription.deleted":
-        subscription = event.data.object
-        db_subscription = db.query(models.Subscription)\
-            .filter(models.Subscription.stripe_subscription_id == subscription.id)\
-            .first()
-        if db_subscription:
-            db_subscription.status = models.SubscriptionStatus.CANCELED
-            db_subscription.canceled_at = datetime.now()
-            db.commit()
-
-    return {"status": "success"}
+    # Persist the event before acknowledging; if Redis is unavailable the
+    # request fails and Stripe redelivers it later
+    await stripe_event_queue.push(event)
+
+    return {"status": "received"}
 
 class CancellationOptions(BaseModel):
     immediate: bool = False
@@ -624,8 +993,9 @@ class CancellationOptions(BaseModel):
     description="Cancel the current subscription")
 @monitor_endpoint("cancel_subscription")
 async def cancel_subscription(
+    tasks: BackgroundTasks,
     options: CancellationOptions = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     if options is None:
@@ -635,18 +1005,23 @@ async def cancel_subscription(
         user_id=current_user.id, immediate=options.immediate)
     
     # Get active subscription with plan in a single optimized query
-    subscription = db.query(models.Subscription)\
-        .options(selectinload(models.Subscription.plan))\
-        .filter(
+    result = await db.execute(
+        select(models.Subscription)
+        .options(selectinload(models.Subscription.plan), raiseload('*'))
+        .where(
             models.Subscription.user_id == current_user.id,
             models.Subscription.status == models.SubscriptionStatus.ACTIVE
-        )\
-        .first()
+        )
+    )
+    subscription = result.scalars().first()
     
     if not subscription:
         structured_logger.log("warning", "No active subscription found for cancellation", user_id=current_user.id)
         raise HTTPException(status_code=404, detail="No active subscription found")
     
+    # Read while the selectinload'ed plan is at hand, before any commit
+    plan_name = subscription.plan.name
+    
     try:
         # Begin a transaction for atomicity
         # Note: We already have an implicit transaction with db.commit() later
@@ -684,33 +1059,28 @@ async def cancel_subscription(
             raise HTTPException(status_code=400, detail=f"Payment provider error: {str(e)}")
         
         # Commit database changes
-        db.commit()
+        await db.commit()
+        await invalidate_subscription_cache(current_user.id)
         
-        # Send cancellation email asynchronously (with correct end date)
-        try:
-            # Use plan data we already loaded with selectinload
-            await EmailService.send_subscription_canceled(
-                email=current_user.email,
-                plan_name=subscription.plan.name,
-                end_date=end_date
-            )
-        except Exception as email_error:
-            # Log error but don't fail the operation - email is non-critical
-            structured_logger.log("error", "Failed to send cancellation email", 
-                error=str(email_error), user_id=current_user.id)
+        # Send cancellation email after the response (with correct end date)
+        # Use plan data we already loaded with selectinload
+        tasks.add_task(send_notification_email, EmailService.send_subscription_canceled,
+                       "cancellation", current_user.id,
+                       email=current_user.email,
+                       plan_name=plan_name,
+                       end_date=end_date)
         
         # Log cancellation event for analytics
         auth.log_auth_activity(
-            db=db,
             user=current_user,
             action="subscription_canceled",
-            details=f"Plan: {subscription.plan.name}, End date: {end_date}, Immediate: {options.immediate}"
+            details=f"Plan: {plan_name}, End date: {end_date}, Immediate: {options.immediate}"
         )
         
         structured_logger.log("info", "Subscription successfully canceled", 
             user_id=current_user.id, 
-            plan=subscription.plan.name,
-            end_date=end_date.isoformat() if end_date else None,
+            plan=plan_name,
+            end_date=end_date,
             immediate=options.immediate)
         
         if options.immediate:
@@ -720,7 +1090,7 @@ async def cancel_subscription(
     
     except Exception as e:
         # Handle unexpected errors
-        db.rollback()  # Roll back the transaction
+        await db.rollback()  # Roll back the transaction
         structured_logger.log("error", "Unexpected error during subscription cancellation", 
             error=str(e), error_type=type(e).__name__, user_id=current_user.id)
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
@@ -732,25 +1102,31 @@ async def cancel_subscription(
     description="Reactivate a subscription that was previously set to cancel at period end")
 @monitor_endpoint("reactivate_subscription")
 async def reactivate_subscription(
-    db: Session = Depends(get_db),
+    tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     structured_logger.log("info", "Subscription reactivation requested", user_id=current_user.id)
     
     # Get subscription that is marked for cancellation at period end
-    subscription = db.query(models.Subscription)\
-        .options(selectinload(models.Subscription.plan))\
-        .filter(
+    result = await db.execute(
+        select(models.Subscription)
+        .options(selectinload(models.Subscription.plan), raiseload('*'))
+        .where(
             models.Subscription.user_id == current_user.id,
             models.Subscription.status == models.SubscriptionStatus.ACTIVE,
             models.Subscription.cancel_at_period_end == True
-        )\
-        .first()
+        )
+    )
+    subscription = result.scalars().first()
     
     if not subscription:
         structured_logger.log("warning", "No subscription eligible for reactivation found", user_id=current_user.id)
         raise HTTPException(status_code=404, detail="No subscription eligible for reactivation found")
     
+    # Read while the selectinload'ed plan is at hand, before any commit
+    plan_name = subscription.plan.name
+    
     try:
         # Reactivate subscription in Stripe
         try:
@@ -767,125 +1143,185 @@ async def reactivate_subscription(
         
         # Update local subscription
         subscription.cancel_at_period_end = False
-        db.commit()
+        await db.commit()
+        await invalidate_subscription_cache(current_user.id)
         
-        # Send reactivation email asynchronously
-        try:
-            await EmailService.send_subscription_reactivated(
-                email=current_user.email,
-                plan_name=subscription.plan.name,
-                next_billing_date=subscription.current_period_end
-            )
-        except Exception as email_error:
-            # Log error but don't fail the operation - email is non-critical
-            structured_logger.log("error", "Failed to send reactivation email", 
-                error=str(email_error), user_id=current_user.id)
+        # Send reactivation email after the response
+        tasks.add_task(send_notification_email, EmailService.send_subscription_reactivated,
+                       "reactivation", current_user.id,
+                       email=current_user.email,
+                       plan_name=plan_name,
+                       next_billing_date=subscription.current_period_end)
         
         # Log reactivation event for analytics
         auth.log_auth_activity(
-            db=db,
             user=current_user,
             action="subscription_reactivated",
-            details=f"Plan: {subscription.plan.name}"
+            details=f"Plan: {plan_name}"
         )
         
         structured_logger.log("info", "Subscription successfully reactivated", 
             user_id=current_user.id, 
-            plan=subscription.plan.name)
+            plan=plan_name)
         
         return {"message": "Your subscription has been reactivated"}
     
     except Exception as e:
         # Handle unexpected errors
-        db.rollback()  # Roll back the transaction
+        await db.rollback()  # Roll back the transaction
         structured_logger.log("error", "Unexpected error during subscription reactivation", 
             error=str(e), error_type=type(e).__name__, user_id=current_user.id)
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
+# Entries are dropped whenever a subscription changes; the TTL is only a backstop
+SUBSCRIPTION_CACHE_TTL = 3600
+
+def _subscription_key(user_id: int) -> str:
+    return f"sub:{user_id}"
+
+async def invalidate_subscription_cache(*user_ids: int):
+    """Drop cached subscriptions; call after the change has committed"""
+    if user_ids:
+        await async_redis.delete(*(_subscription_key(uid) for uid in user_ids))
+
+async def get_active_subscription(user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Return the user's active subscription with its plan, shaped for the API.
+    
+    The plan is eager loaded in the same round-trip and the shaped dict is
+    cached in Redis, so the status, GPU and model endpoints share one lookup.
+    """
+    key = _subscription_key(user_id)
+    cached = await async_redis.get(key)
+    if cached is not None:
+        return orjson.loads(cached)
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(models.Subscription)
+            .options(selectinload(models.Subscription.plan), raiseload('*'))
+            .where(
+                models.Subscription.user_id == user_id,
+                models.Subscription.status == models.SubscriptionStatus.ACTIVE
+            )
+        )
+        subscription = result.scalars().first()
+    
+    # Users without a subscription are cached too, as JSON null
+    body = (
+        SubscriptionOut.model_validate(subscription).model_dump_json().encode()
+        if subscription else b"null"
+    )
+    await async_redis.set(key, body, ex=SUBSCRIPTION_CACHE_TTL)
+    return orjson.loads(body)
+
+async def active_subscription(
+    current_user: models.User = Depends(auth.get_current_user)
+) -> Optional[Dict[str, Any]]:
+    """Dependency form of get_active_subscription; FastAPI resolves it once per request"""
+    return await get_active_subscription(current_user.id)
+
+def require_feature(feature: str, detail: str = "This feature requires a Pro subscription"):
+    """Dependency factory that rejects users whose active plan lacks ``feature``"""
+    async def dependency(
+        subscription: Optional[Dict[str, Any]] = Depends(active_subscription)
+    ) -> Dict[str, Any]:
+        if not subscription or not subscription["plan"].get(feature):
+            raise HTTPException(status_code=403, detail=detail)
+        return subscription
+    return dependency
+
 @app.get("/api/subscription/status",
-    response_model=Dict[str, Any],
+    response_model=SubscriptionStatusOut,
     tags=["subscription"],
     summary="Get subscription status",
     description="Get current user's subscription status")
 @monitor_endpoint("get_subscription_status")
-@cache_response(timeout=60)  # Cache for 1 minute
 async def get_subscription_status(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    subscription: Optional[Dict[str, Any]] = Depends(active_subscription)
 ):
-    # Use a join to efficiently fetch subscription with plan details in a single query
-    # This avoids the N+1 query problem when accessing subscription.plan
-    subscription = db.query(models.Subscription)\
-        .options(
-            selectinload(models.Subscription.plan)  # Eager load the plan relationship
-        )\
-        .filter(
-            models.Subscription.user_id == current_user.id,
-            models.Subscription.status == models.SubscriptionStatus.ACTIVE
-        )\
-        .first()
-    
-    if not subscription:
-        return {
-            "has_subscription": False,
-            "subscription": None
-        }
-    
-    # Extract only the needed plan data to avoid serializing the entire object
-    plan_data = {
-        "id": subscription.plan.id,
-        "name": subscription.plan.name,
-        "description": subscription.plan.description,
-        "price": subscription.plan.price,
-        "interval": subscription.plan.interval,
-        "features": subscription.plan.features,
-        "allows_ollama": subscription.plan.allows_ollama
-    }
-    
     return {
-        "has_subscription": True,
-        "subscription": {
-            "plan": plan_data,
-            "status": subscription.status,
-            "current_period_end": subscription.current_period_end,
-            "cancel_at_period_end": subscription.cancel_at_period_end
-        }
+        "has_subscription": subscription is not None,
+        "subscription": subscription
     }
 
+# Client-side throttle for Stripe, shared by all workers through Redis.
+# Each customer gets a bucket of STRIPE_BUCKET_CAPACITY calls refilled at
+# STRIPE_BUCKET_REFILL per second, keeping bursts under Stripe's rate limits
+STRIPE_BUCKET_CAPACITY = 20
+STRIPE_BUCKET_REFILL = 10
+STRIPE_MAX_RETRIES = 3
+STRIPE_BACKOFF_BASE = 0.5
+
+# Returns 0 when a token was taken, otherwise the seconds until one is available
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * refill)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / refill
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill) + 1)
+return tostring(wait)
+"""
+
+async def stripe_gate(key: str):
+    """Wait until the token bucket for ``key`` allows another Stripe call"""
+    while True:
+        wait = float(await async_redis.eval(
+            TOKEN_BUCKET_LUA, 1, f"sb:{key}", STRIPE_BUCKET_CAPACITY, STRIPE_BUCKET_REFILL
+        ))
+        if not wait:
+            return
+        await asyncio.sleep(wait)
+
+async def call_stripe(key: str, func: Callable, *args, **kwargs):
+    """Run a blocking Stripe call in a thread behind the rate gate, backing off on 429s"""
+    for attempt in range(STRIPE_MAX_RETRIES + 1):
+        await stripe_gate(key)
+        try:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        except stripe.error.RateLimitError:
+            if attempt == STRIPE_MAX_RETRIES:
+                raise
+            await asyncio.sleep(STRIPE_BACKOFF_BASE * 2 ** attempt)
+
 # Payment Method Endpoints
 @app.post("/api/payment-methods",
-    response_model=Dict[str, Any],
+    response_model=PaymentMethodOut,
     tags=["payment"],
     summary="Add payment method",
     description="Add a new payment method for the user")
 @monitor_endpoint("add_payment_method")
 async def add_payment_method(
     payment_method: PaymentMethodCreate,
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     try:
         # Check if customer exists in Stripe
         if not current_user.stripe_customer_id:
-            # Create customer if needed
-            customer = stripe.Customer.create(
-                email=current_user.email,
-                metadata={"user_id": current_user.id}
+            # Create customer if needed; stored on the user row right away
+            current_user.stripe_customer_id = await ensure_stripe_customer(
+                current_user.id, current_user.email
             )
-            current_user.stripe_customer_id = customer.id
-            # We'll commit this change along with other database operations later
         
-        # Attach payment method to Stripe customer in a single API call
-        # and retrieve payment method details in the same call
+        # Attach returns the full payment method, so no separate retrieve is needed
         try:
-            # First attach payment method
-            stripe.PaymentMethod.attach(
+            pm = await call_stripe(
+                current_user.stripe_customer_id,
+                stripe.PaymentMethod.attach,
                 payment_method.payment_method_id,
                 customer=current_user.stripe_customer_id
             )
-            
-            # Then retrieve payment method details
-            pm = stripe.PaymentMethod.retrieve(payment_method.payment_method_id)
         except stripe.error.StripeError as e:
             # Handle specific Stripe errors with better error messages
             error_message = str(e)
@@ -899,39 +1335,48 @@ async def add_payment_method(
                                error_message=error_message)
             raise HTTPException(status_code=400, detail=error_message)
 
-        # Begin transaction to ensure all database operations succeed or fail together
+        # Begin transaction to ensure all database operations succeed or fail together;
+        # the session is only opened now so no connection is held during Stripe calls
         try:
-            # Create payment method record
-            db_payment_method = models.PaymentMethod(
-                user_id=current_user.id,
-                stripe_payment_method_id=pm.id,
-                type=pm.type,
-                last4=pm.card.last4,
-                exp_month=pm.card.exp_month,
-                exp_year=pm.card.exp_year,
-                is_default=payment_method.set_default
-            )
-            
-            if payment_method.set_default:
-                # Set all other payment methods as non-default in single query
-                db.query(models.PaymentMethod)\
-                    .filter(models.PaymentMethod.user_id == current_user.id)\
-                    .update({"is_default": False})
+            # Clearing the old default and inserting the new row share one
+            # transaction; RETURNING hands back the row so no refresh is needed
+            async with AsyncSessionLocal() as db, db.begin():
+                if payment_method.set_default:
+                    # Update the default in Stripe while other rows are cleared;
+                    # both are awaited before raising so the session is idle on rollback
+                    results = await asyncio.gather(
+                        call_stripe(
+                            current_user.stripe_customer_id,
+                            stripe.Customer.modify,
+                            current_user.stripe_customer_id,
+                            invoice_settings={
+                                "default_payment_method": payment_method.payment_method_id
+                            }
+                        ),
+                        db.execute(
+                            update(models.PaymentMethod)
+                            .where(models.PaymentMethod.user_id == current_user.id)
+                            .values(is_default=False)
+                        ),
+                        return_exceptions=True
+                    )
+                    for outcome in results:
+                        if isinstance(outcome, BaseException):
+                            raise outcome
                 
-                # Update default payment method in Stripe
-                stripe.Customer.modify(
-                    current_user.stripe_customer_id,
-                    invoice_settings={
-                        "default_payment_method": payment_method.payment_method_id
-                    }
-                )
-            
-            # Add new payment method to database
-            db.add(db_payment_method)
-            
-            # Commit all changes at once (customer ID update, payment method flags, new payment method)
-            db.commit()
-            db.refresh(db_payment_method)
+                db_payment_method = (await db.execute(
+                    insert(models.PaymentMethod)
+                    .values(
+                        user_id=current_user.id,
+                        stripe_payment_method_id=pm.id,
+                        type=pm.type,
+                        last4=pm.card.last4,
+                        exp_month=pm.card.exp_month,
+                        exp_year=pm.card.exp_year,
+                        is_default=payment_method.set_default
+                    )
+                    .returning(models.PaymentMethod)
+                )).scalar_one()
             
             # Log successful operation
             structured_logger.log("info", "Payment method added successfully",
@@ -941,8 +1386,7 @@ async def add_payment_method(
             
             return db_payment_method
         except Exception as db_error:
-            # Rollback transaction on database error
-            db.rollback()
+            # Leaving the session block rolls back the open transaction
             
             # Log the database error
             structured_logger.log("error", "Database error adding payment method",
@@ -951,7 +1395,11 @@ async def add_payment_method(
             
             # Try to detach the payment method from Stripe to clean up
             try:
-                stripe.PaymentMethod.detach(payment_method.payment_method_id)
+                await call_stripe(
+                    current_user.stripe_customer_id,
+                    stripe.PaymentMethod.detach,
+                    payment_method.payment_method_id
+                )
             except stripe.error.StripeError:
                 # Ignore errors during cleanup
                 pass
@@ -965,20 +1413,33 @@ async def add_payment_method(
                            error_message=str(e))
         raise HTTPException(status_code=400, detail=str(e))
 
+# Only the columns the list endpoints serialize are selected
+PAYMENT_METHOD_LIST_COLUMNS = (
+    models.PaymentMethod.id,
+    models.PaymentMethod.stripe_payment_method_id,
+    models.PaymentMethod.type,
+    models.PaymentMethod.last4,
+    models.PaymentMethod.exp_month,
+    models.PaymentMethod.exp_year,
+    models.PaymentMethod.is_default,
+    models.PaymentMethod.created_at,
+)
+
 @app.get("/api/payment-methods",
-    response_model=List[Dict[str, Any]],
+    response_model=List[PaymentMethodOut],
     tags=["payment"],
     summary="List payment methods",
     description="Get list of user's payment methods")
 @monitor_endpoint("list_payment_methods")
 async def list_payment_methods(
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    payment_methods = db.query(models.PaymentMethod)\
-        .filter(models.PaymentMethod.user_id == current_user.id)\
-        .all()
-    return payment_methods
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(*PAYMENT_METHOD_LIST_COLUMNS)
+            .where(models.PaymentMethod.user_id == current_user.id)
+        )
+        return [dict(row) for row in result.mappings()]
 
 @app.delete("/api/payment-methods/{payment_method_id}",
     response_model=Dict[str, str],
@@ -988,25 +1449,35 @@ async def list_payment_methods(
 @monitor_endpoint("delete_payment_method")
 async def delete_payment_method(
     payment_method_id: str,
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Get payment method from database
-    payment_method = db.query(models.PaymentMethod)\
-        .filter(models.PaymentMethod.user_id == current_user.id)\
-        .filter(models.PaymentMethod.stripe_payment_method_id == payment_method_id)\
-        .first()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(models.PaymentMethod)
+            .where(models.PaymentMethod.user_id == current_user.id)
+            .where(models.PaymentMethod.stripe_payment_method_id == payment_method_id)
+        )
+        payment_method = result.scalars().first()
     
     if not payment_method:
         raise HTTPException(status_code=404, detail="Payment method not found")
     
     try:
         # Detach payment method from Stripe customer
-        stripe.PaymentMethod.detach(payment_method_id)
+        await call_stripe(
+            current_user.stripe_customer_id,
+            stripe.PaymentMethod.detach,
+            payment_method_id
+        )
         
         # Delete from database
-        db.delete(payment_method)
-        db.commit()
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(models.PaymentMethod)
+                .where(models.PaymentMethod.id == payment_method.id)
+            )
+            await db.commit()
         
         return {"message": "Payment method deleted successfully"}
     except stripe.error.StripeError as e:
@@ -1020,84 +1491,85 @@ async def delete_payment_method(
 @monitor_endpoint("set_default_payment_method")
 async def set_default_payment_method(
     payment_method_id: str,
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    # Get payment method from database
-    payment_method = db.query(models.PaymentMethod)\
-        .filter(models.PaymentMethod.user_id == current_user.id)\
-        .filter(models.PaymentMethod.stripe_payment_method_id == payment_method_id)\
-        .first()
-    
-    if not payment_method:
-        raise HTTPException(status_code=404, detail="Payment method not found")
-    
-    try:
-        # Update default payment method in Stripe
-        stripe.Customer.modify(
-            current_user.stripe_customer_id,
-            invoice_settings={
-                "default_payment_method": payment_method_id
-            }
+    # Swap the default flag across the user's methods in one statement; the
+    # returned flags double as the ownership check before Stripe is touched
+    async with AsyncSessionLocal() as db, db.begin():
+        result = await db.execute(
+            update(models.PaymentMethod)
+            .where(models.PaymentMethod.user_id == current_user.id)
+            .values(is_default=case(
+                (models.PaymentMethod.stripe_payment_method_id == payment_method_id, True),
+                else_=False
+            ))
+            .returning(models.PaymentMethod.is_default)
         )
+        if not any(result.scalars()):
+            raise HTTPException(status_code=404, detail="Payment method not found")
         
-        # Update in database
-        db.query(models.PaymentMethod)\
-            .filter(models.PaymentMethod.user_id == current_user.id)\
-            .update({"is_default": False})
-        
-        payment_method.is_default = True
-        db.commit()
-        
-        return {"message": "Default payment method updated successfully"}
-    except stripe.error.StripeError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-async def send_verification_email(email: str, token: str):
-    """
-    Send verification email using the EmailService
+        # The swap only commits once Stripe has accepted the new default
+        try:
+            await call_stripe(
+                current_user.stripe_customer_id,
+                stripe.Customer.modify,
+                current_user.stripe_customer_id,
+                invoice_settings={
+                    "default_payment_method": payment_method_id
+                }
+            )
+        except stripe.error.StripeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
-    Args:
-        email: User's email address 
-        token: Verification token (JWT)
-    """
-    try:
-        # Log email sending attempt without showing the token
-        structured_logger.log("info", "Sending verification email", email=email)
-        
-        # Use the EmailService to send the verification email securely
-        await EmailService.send_verification_email(email, token)
-        
-        structured_logger.log("info", "Verification email sent successfully", email=email)
-    except Exception as e:
-        # Log the error without exposing sensitive information
-        structured_logger.log("error", "Failed to send verification email", 
-                             error_type=type(e).__name__)
-        logger.error(f"Error sending verification email: {str(e)}")
-        # Don't raise the exception to prevent exposing sensitive information
+    return {"message": "Default payment method updated successfully"}
 
-async def send_reset_email(email: str, token: str):
+async def send_notification_email(send, kind: str, user_id: int, *args, **kwargs):
     """
-    Send password reset email using the EmailService
+    Send a non-critical account email, logging failures instead of raising
     
     Args:
-        email: User's email address
-        token: Reset token (JWT)
+        send: EmailService coroutine function to call
+        kind: Short email description used in the error log
+        user_id: ID of the user the email is for
     """
     try:
-        # Log email sending attempt without showing the token
-        structured_logger.log("info", "Sending password reset email", email=email)
-        
-        # Use the EmailService to send the password reset email securely
-        await EmailService.send_password_reset_email(email, token)
-        
-        structured_logger.log("info", "Password reset email sent successfully", email=email)
+        await send(*args, **kwargs)
     except Exception as e:
-        # Log the error without exposing sensitive information
-        structured_logger.log("error", "Failed to send password reset email", 
-                             error_type=type(e).__name__)
-        logger.error(f"Error sending password reset email: {str(e)}")
-        # Don't raise the exception to prevent exposing sensitive information
+        structured_logger.log("error", f"Failed to send {kind} email",
+                             error=str(e), user_id=user_id)
+
+# Per-user cap on in-flight heavy requests. Slots older than the window are
+# treated as leaked (e.g. a killed worker) and reclaimed on the next call
+MAX_CONCURRENT_REQUESTS = 3
+CONCURRENT_SLOT_WINDOW = 300
+
+CONCURRENT_LUA = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+async def concurrency_slot(
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Dependency holding one of the user's concurrent-request slots for the request"""
+    key = f"cc:{current_user.id}"
+    slot = secrets.token_hex(8)
+    allowed = await async_redis.eval(
+        CONCURRENT_LUA, 1, key, slot, CONCURRENT_SLOT_WINDOW, MAX_CONCURRENT_REQUESTS
+    )
+    if not allowed:
+        raise HTTPException(status_code=429, detail="Too many concurrent requests")
+    try:
+        yield
+    finally:
+        await async_redis.zrem(key, slot)
 
 # GPU and Model Management Endpoints
 @app.get("/api/gpu-status",
@@ -1107,16 +1579,9 @@ async def send_reset_email(email: str, token: str):
     description="Get current GPU status and model recommendations")
 @monitor_endpoint("get_gpu_status")
 async def get_gpu_status(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    subscription: Optional[Dict[str, Any]] = Depends(active_subscription)
 ):
-    # Check subscription features
-    subscription = db.query(models.Subscription)\
-        .filter(models.Subscription.user_id == current_user.id)\
-        .filter(models.Subscription.status == models.SubscriptionStatus.ACTIVE)\
-        .first()
-
-    if not subscription or subscription.plan.price < 79.99:  # Pro plan check
+    if not subscription or subscription["plan"]["price"] < 79.99:  # Pro plan check
         return {"error": "GPU acceleration requires a Pro subscription"}
 
     from .llm_wrapper import llm
@@ -1130,18 +1595,11 @@ async def get_gpu_status(
 @monitor_endpoint("update_model")
 async def update_model(
     model_data: Dict[str, str],
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    subscription: Dict[str, Any] = Depends(
+        require_feature("allows_ollama", "Ollama access requires a Pro subscription")
+    ),
+    _slot: None = Depends(concurrency_slot)
 ):
-    # Check subscription features
-    subscription = db.query(models.Subscription)\
-        .filter(models.Subscription.user_id == current_user.id)\
-        .filter(models.Subscription.status == models.SubscriptionStatus.ACTIVE)\
-        .first()
-
-    if not subscription or not subscription.plan.allows_ollama:
-        raise HTTPException(status_code=403, detail="Ollama access requires a Pro subscription")
-
     from .llm_wrapper import llm
     try:
         llm.update_ollama_model(model_data["model"])
@@ -1160,7 +1618,8 @@ async def create_research_task(
     query: str,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    current_user: models.User = Depends(auth.get_current_user),
+    _slot: None = Depends(concurrency_slot)
 ):
     # For ADK enabled systems, redirect to ADK research
     if ADK_ENABLED:
@@ -1199,68 +1658,119 @@ async def create_research_task(
     summary="Get research task details",
     description="Retrieve status and results of a specific research task")
 @monitor_endpoint("get_research_task")
-@cache_response(timeout=300)  # Cache for 5 minutes
 async def get_research_task(
     task_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
+    # Check task ownership before loading it; admins may read any task, so
+    # they skip the lookup, and everyone else only fetches the owner column
+    if current_user.role != models.UserRole.ADMIN:
+        owner_id = db.scalar(
+            select(models.ResearchTask.owner_id).where(models.ResearchTask.id == task_id)
+        )
+        if owner_id is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        if owner_id != current_user.id:
+            structured_logger.log("warning", "Unauthorized task access attempt",
+                task_id=task_id,
+                user_id=current_user.id
+            )
+            raise HTTPException(status_code=403, detail="Not authorized to access this task")
+    
     task = await research_service.get_task_status(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
         
-    # Check task ownership
-    db_task = db.query(models.ResearchTask).filter(models.ResearchTask.id == task_id).first()
-    if db_task.owner_id != current_user.id and current_user.role != models.UserRole.ADMIN:
-        structured_logger.log("warning", "Unauthorized task access attempt",
-            task_id=task_id,
-            user_id=current_user.id
-        )
-        raise HTTPException(status_code=403, detail="Not authorized to access this task")
-        
     return task
 
+TASK_LIST_COLUMNS = (
+    models.ResearchTask.id,
+    models.ResearchTask.query,
+    models.ResearchTask.status,
+    models.ResearchTask.created_at,
+    models.ResearchTask.updated_at,
+    models.ResearchTask.completed_at,
+)
+
+# Task lists page by keyset on (created_at, id), newest first, so deep pages
+# are an index seek instead of scanning and discarding OFFSET rows. The cursor
+# for the next page is returned in this header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def _encode_task_cursor(row) -> str:
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_task_cursor(cursor: str):
+    try:
+        created_at, task_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(task_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def _list_task_page(stmt, after: Optional[str], limit: int, response: Response):
+    if after:
+        stmt = stmt.where(
+            tuple_(models.ResearchTask.created_at, models.ResearchTask.id)
+            < tuple_(*_decode_task_cursor(after))
+        )
+    stmt = stmt.order_by(
+        models.ResearchTask.created_at.desc(), models.ResearchTask.id.desc()
+    ).limit(limit)
+    async with AsyncSessionLocal() as db:
+        rows = [dict(row) for row in (await db.execute(stmt)).mappings()]
+    if len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = _encode_task_cursor(rows[-1])
+    return rows
+
 @app.get("/api/research/tasks",
-    response_model=List[Dict[str, Any]],
+    response_model=List[ResearchTaskSummary],
     tags=["research"],
     summary="List research tasks",
-    description="Get paginated list of research tasks for current user")
+    description="Get a page of research tasks for current user, newest first")
 @monitor_endpoint("list_research_tasks")
-@cache_response(timeout=60)  # Cache for 1 minute
 async def list_research_tasks(
-    skip: int = 0,
-    limit: int = 10,
-    db: Session = Depends(get_db),
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    tasks = db.query(models.ResearchTask)\
-        .filter(models.ResearchTask.owner_id == current_user.id)\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
-    return tasks
+    return await _list_task_page(
+        select(*TASK_LIST_COLUMNS).where(models.ResearchTask.owner_id == current_user.id),
+        after, limit, response
+    )
 
 # Admin Endpoints
 @app.get("/api/admin/tasks",
-    response_model=List[Dict[str, Any]],
+    response_model=List[AdminResearchTaskSummary],
     tags=["admin"],
     summary="Admin: List all tasks",
-    description="Get paginated list of all research tasks (admin only)")
+    description="Get a page of all research tasks, newest first (admin only)")
 @monitor_endpoint("admin_list_tasks")
-@cache_response(timeout=60)
 async def admin_list_all_tasks(
-    skip: int = 0,
-    limit: int = 10,
-    db: Session = Depends(get_db),
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
     current_user: models.User = Depends(auth.check_admin_role)
 ):
-    tasks = db.query(models.ResearchTask)\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
-    return tasks
+    return await _list_task_page(
+        select(*TASK_LIST_COLUMNS, models.ResearchTask.owner_id),
+        after, limit, response
+    )
 
 # Health Check Endpoints
+HEALTH_CACHE_TTL = 2.0
+_health_cache = {"t": 0.0, "v": None}
+_health_lock = asyncio.Lock()
+# Reused for every refresh; only mutated while holding _health_lock
+_HEALTH_TMPL = {
+    "status": "healthy",
+    "version": "1.0.0",
+    "timestamp": None,
+    "dependencies": {"database": "", "cache": "", "adk": ""}
+}
+
 @app.get("/",
     tags=["health"],
     summary="Basic health check",
@@ -1275,98 +1785,162 @@ async def root():
     description="Get detailed health status of the API and its dependencies")
 @monitor_endpoint("detailed_health_check")
 async def health_check():
-    redis_status = "healthy" if cache.client.ping() else "unhealthy"
-    db_status = "healthy"
-    adk_status = "disabled"
-    
-    try:
-        db = next(get_db())
-        db.execute("SELECT 1")
-    except Exception:
-        db_status = "unhealthy"
-    
-    # Check ADK status if enabled
-    if ADK_ENABLED:
-        try:
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{ADK_BASE_URL}/health", timeout=2) as response:
-                    if response.status == 200:
-                        adk_status = "healthy"
-                    else:
-                        adk_status = "unhealthy"
-        except Exception:
-            adk_status = "unhealthy"
-    
-    return {
-        "status": "healthy",
-        "version": "1.0.0",
-        "timestamp": datetime.now().isoformat(),
-        "dependencies": {
-            "database": db_status,
-            "cache": redis_status,
-            "adk": adk_status
-        }
-    }
+    # Liveness, readiness and load-balancer probes all land here; serve a
+    # result that is at most HEALTH_CACHE_TTL old and let only one caller
+    # at a time run the dependency checks.
+    if time.monotonic() - _health_cache["t"] < HEALTH_CACHE_TTL and _health_cache["v"]:
+        return Response(_health_cache["v"], media_type="application/json")
+    async with _health_lock:
+        if time.monotonic() - _health_cache["t"] < HEALTH_CACHE_TTL and _health_cache["v"]:
+            return Response(_health_cache["v"], media_type="application/json")
+        dependencies = _HEALTH_TMPL["dependencies"]
+        (dependencies["database"], dependencies["cache"],
+         dependencies["adk"]) = await _check_health()
+        _HEALTH_TMPL["timestamp"] = datetime.now()
+        _health_cache["v"] = orjson.dumps(_HEALTH_TMPL)
+        _health_cache["t"] = time.monotonic()
+        return Response(_health_cache["v"], media_type="application/json")
+
+async def _check_database():
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+    return "healthy"
+
+async def _check_cache():
+    return "healthy" if await async_redis.ping() else "unhealthy"
+
+async def _check_adk():
+    if not ADK_ENABLED:
+        return "disabled"
+    response = await app.state.http.get(f"{ADK_BASE_URL}/health")
+    return "healthy" if response.status_code == 200 else "unhealthy"
+
+async def _check_health():
+    # Probes run concurrently, so a refresh takes as long as the slowest one
+    results = await asyncio.gather(
+        _check_database(), _check_cache(), _check_adk(), return_exceptions=True
+    )
+    return tuple(
+        "unhealthy" if isinstance(result, BaseException) else result
+        for result in results
+    )
 
 # Error Handlers
+# Kept async on purpose: Starlette runs sync exception handlers through
+# run_in_threadpool, which costs a thread hop per error.
+# No custom dispatch layer either: ExceptionMiddleware already stores these
+# in a dict keyed by class and resolves them by walking type(exc).__mro__,
+# so HTTPException is a single dict hit and Exception is handled by
+# ServerErrorMiddleware directly.
+@functools.lru_cache(maxsize=256)
+def _encode_http_error(status_code: int, detail: str) -> bytes:
+    # Most HTTPException details are short string constants ("Not
+    # authenticated", "Task not found"), so the encoded bodies repeat.
+    return orjson.dumps({"detail": detail})
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     structured_logger.log("error", "HTTP error",
         status_code=exc.status_code,
         detail=exc.detail,
-        path=request.url.path
+        path=request.scope.get("path", "")
     )
-    return JSONResponse(
+    return Response(
+        content=(
+            _encode_http_error(exc.status_code, exc.detail)
+            if isinstance(exc.detail, str)
+            else orjson.dumps({"detail": exc.detail})
+        ),
         status_code=exc.status_code,
-        content={"detail": exc.detail}
+        media_type="application/json",
+        headers=getattr(exc, "headers", None)
     )
 
+_INTERNAL_ERROR_BODY = orjson.dumps({"detail": "Internal server error"})
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
+    # Unexpected 500s are rare, so log everything needed to debug them
     structured_logger.log("error", "Unexpected error",
         error_type=type(exc).__name__,
         error_details=str(exc),
-        path=request.url.path
+        traceback="".join(traceback.format_exception(type(exc), exc, exc.__traceback__)),
+        path=request.scope.get("path", "")
     )
-    return JSONResponse(
+    return Response(
+        content=_INTERNAL_ERROR_BODY,
         status_code=500,
-        content={"detail": "Internal server error"}
+        media_type="application/json"
     )
 
 # Custom OpenAPI Schema
-def custom_openapi():
-    if app.openapi_schema:
-        return app.openapi_schema
-    
-    openapi_schema = get_openapi(
-        title=app.title,
-        version=app.version,
-        description=app.description,
-        routes=app.routes,
-    )
-    
-    # Add security scheme
-    openapi_schema["components"]["securitySchemes"] = {
-        "bearerAuth": {
-            "type": "http",
-            "scheme": "bearer",
-            "bearerFormat": "JWT"
-        }
+_SEC_SCHEMES = types.MappingProxyType({
+    "bearerAuth": {
+        "type": "http",
+        "scheme": "bearer",
+        "bearerFormat": "JWT"
     }
+})
+
+_openapi_lock = threading.Lock()
+
+def custom_openapi():
+    schema = app.openapi_schema
+    if schema:
+        return schema
     
-    app.openapi_schema = openapi_schema
-    return app.openapi_schema
+    with _openapi_lock:
+        if app.openapi_schema:
+            return app.openapi_schema
+        
+        openapi_schema = get_openapi(
+            title=app.title,
+            version=app.version,
+            description=app.description,
+            routes=app.routes,
+        )
+        
+        # Add security scheme
+        openapi_schema.setdefault("components", {})["securitySchemes"] = dict(_SEC_SCHEMES)
+        
+        app.openapi_schema = openapi_schema
+        return openapi_schema
 
 app.openapi = custom_openapi
 
-if __name__ == "__main__":
-    import uvicorn
-    import os
+# Build the schema once all routes are registered so no request pays for it
+OPENAPI_URL = "/openapi.json"
+OPENAPI_JSON = orjson.dumps(app.openapi())
+OPENAPI_GZIP = gzip.compress(OPENAPI_JSON, 6)
+OPENAPI_ETAG = '"' + hashlib.blake2b(OPENAPI_JSON, digest_size=16).hexdigest() + '"'
+OPENAPI_HEADERS = {"ETag": OPENAPI_ETAG, "Cache-Control": "public, max-age=300", "Vary": "Accept-Encoding"}
+
+@app.get(OPENAPI_URL, include_in_schema=False)
+async def openapi_json(request: Request):
+    if _etag_matches(request.headers.get("if-none-match"), OPENAPI_ETAG):
+        return Response(status_code=304, headers=OPENAPI_HEADERS)
     
-    # Use environment variable for host binding, default to localhost for security
-    host = os.getenv("API_HOST", "127.0.0.1")
-    port = int(os.getenv("API_PORT", "8000"))
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=OPENAPI_GZIP,
+            media_type="application/json",
+            headers={**OPENAPI_HEADERS, "Content-Encoding": "gzip"}
+        )
     
-    # In production, this should be handled by a proper ASGI server
-    uvicorn.run(app, host=host, port=port)
\ No newline at end of file
+    return Response(content=OPENAPI_JSON, media_type="application/json", headers=OPENAPI_HEADERS)
+
+@app.get("/api/docs", include_in_schema=False)
+async def swagger_ui():
+    return get_swagger_ui_html(openapi_url=OPENAPI_URL, title=f"{app.title} - Swagger UI")
+
+@app.get("/api/redoc", include_in_schema=False)
+async def redoc():
+    return get_redoc_html(openapi_url=OPENAPI_URL, title=f"{app.title} - ReDoc")
+
+# Run with gunicorn managing one uvicorn worker per core:
+#   gunicorn -k uvicorn.workers.UvicornWorker -w $(nproc) src.api.main:app
+# Do not add --preload: importing in the master starts the logging listener
+# thread (monitoring.py) there, and forked workers would inherit its queue
+# without the thread, so their log records would never be written.
+# uvicorn[standard] installs uvloop and httptools, and UvicornWorker's "auto"
+# loop/http settings select both, so no extra flags are needed here.
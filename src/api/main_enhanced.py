@@ -7,14 +7,16 @@ advanced security, distributed state management, and innovation features.
 
 import os
 import logging
+import time
+import orjson
+from datetime import datetime, timezone
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from fastapi import FastAPI, Request, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from prometheus_client import make_asgi_app
 
 # Import routers
@@ -24,6 +26,8 @@ from .models import User
 
 # Security and middleware
 from .middleware.rate_limiter import RateLimiter
+from .middleware.parallax import ParallaxMiddleware
+from .middleware.compression import SelectiveGZipMiddleware
 from .security.validation import ErrorResponse
 
 # WebSocket manager
@@ -53,6 +57,47 @@ if os.getenv('ENVIRONMENT') == 'production':
     client.setup_logging()
 
 
+# Export formats available to each subscription tier
+_ALLOWED_FORMATS = {
+    tier: frozenset(formats)
+    for tier, formats in {
+        'free': ('txt', 'json'),
+        'basic': ('txt', 'json', 'pdf'),
+        'pro': ('txt', 'json', 'pdf', 'docx', 'notion'),
+        'enterprise': ('txt', 'json', 'pdf', 'docx', 'notion', 'custom')
+    }.items()
+}
+
+
+# How long probe and admin requests reuse the last ADK agent health check
+HEALTH_CACHE_TTL = 1.5
+ADMIN_METRICS_CACHE_TTL = 10.0
+
+# Health timestamp, re-formatted at most once per second
+_health_timestamp = (0, "")
+
+
+def _health_time() -> str:
+    """UTC ISO timestamp for /health, cached for the current second"""
+    global _health_timestamp
+    now = int(time.time())
+    if now != _health_timestamp[0]:
+        _health_timestamp = (now, datetime.fromtimestamp(now, timezone.utc).isoformat())
+    return _health_timestamp[1]
+
+
+# Binary exports are streamed as files instead of base64 inside JSON
+_STREAMED_EXPORT_FORMATS = frozenset({'pdf', 'docx', 'xlsx'})
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_export_chunks(content: bytes):
+    """Yield an export file in fixed-size slices without copying it"""
+    view = memoryview(content)
+    for start in range(0, len(view), EXPORT_CHUNK_SIZE):
+        yield view[start:start + EXPORT_CHUNK_SIZE]
+
+
 # Global instances
 websocket_manager: EnhancedADKWebSocketManager = None
 state_manager: DistributedStateManager = None
@@ -81,6 +126,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     rate_limiter = RateLimiter(
         redis_url=os.getenv('REDIS_URL', 'redis://localhost:6379')
     )
+    app.state.rate_limiter = rate_limiter
     
     # Initialize WebSocket manager
     websocket_manager = EnhancedADKWebSocketManager()
@@ -120,6 +166,7 @@ app = FastAPI(
     description="Multi-Agent Research Platform powered by Google Cloud ADK",
     version="2.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json"
@@ -142,34 +189,10 @@ app.add_middleware(
 )
 
 # Compression
-app.add_middleware(GZipMiddleware, minimum_size=1000)
-
-# Rate limiting middleware
-@app.middleware("http")
-async def rate_limit_middleware(request: Request, call_next):
-    """Apply rate limiting to all requests"""
-    
-    if rate_limiter:
-        return await rate_limiter.middleware(
-            max_requests=60,  # Per minute
-            window_seconds=60
-        )(request, call_next)
-    
-    return await call_next(request)
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1000)
 
-# Request ID middleware
-@app.middleware("http")
-async def request_id_middleware(request: Request, call_next):
-    """Add request ID to all requests"""
-    
-    import uuid
-    request_id = str(uuid.uuid4())
-    request.state.request_id = request_id
-    
-    response = await call_next(request)
-    response.headers["X-Request-ID"] = request_id
-    
-    return response
+# Request ID and rate limiting, applied outermost
+app.add_middleware(ParallaxMiddleware, max_requests=60, window_seconds=60)
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
@@ -196,7 +219,7 @@ async def health_check():
     # Check ADK agents if available
     if websocket_manager and hasattr(websocket_manager, 'adk'):
         try:
-            agent_health = await websocket_manager.adk.get_agent_health()
+            agent_health = await websocket_manager.get_agent_health(HEALTH_CACHE_TTL)
             checks["adk_agents"] = agent_health['overall_status']
         except Exception:
             checks["adk_agents"] = "error"
@@ -207,7 +230,7 @@ async def health_check():
     return {
         "status": overall,
         "checks": checks,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _health_time()
     }
 
 # WebSocket endpoint
@@ -243,7 +266,7 @@ async def websocket_endpoint(
         
         # Handle messages
         while True:
-            data = await websocket.receive_json()
+            data = orjson.loads(await websocket.receive_text())
             await websocket_manager.handle_message(
                 websocket,
                 session_id,
@@ -255,8 +278,9 @@ async def websocket_endpoint(
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         try:
-            await websocket.send_json(
-                ErrorResponse.get("websocket_error", session_id)
+            # Text frame, as browser clients JSON.parse the message data
+            await websocket.send_text(
+                ErrorResponse.get_bytes("websocket_error", session_id).decode()
             )
         except:
             pass
@@ -374,14 +398,7 @@ async def export_research(
     """Export research results in various formats"""
     
     # Check user tier for export format access
-    allowed_formats = {
-        'free': ['txt', 'json'],
-        'basic': ['txt', 'json', 'pdf'],
-        'pro': ['txt', 'json', 'pdf', 'docx', 'notion'],
-        'enterprise': ['txt', 'json', 'pdf', 'docx', 'notion', 'custom']
-    }
-    
-    user_formats = allowed_formats.get(current_user.subscription_tier, allowed_formats['free'])
+    user_formats = _ALLOWED_FORMATS.get(current_user.subscription_tier, _ALLOWED_FORMATS['free'])
     requested_format = request.get('format', 'pdf')
     
     if requested_format not in user_formats:
@@ -411,7 +428,8 @@ async def export_research(
         research_data.get('results', {}),
         requested_format,
         request.get('template', 'academic'),
-        request.get('options', {})
+        request.get('options', {}),
+        encode=requested_format not in _STREAMED_EXPORT_FORMATS
     )
     
     if not result['success']:
@@ -420,6 +438,16 @@ async def export_research(
             detail=result.get('error', 'Export failed')
         )
     
+    if 'content' in result:
+        return StreamingResponse(
+            _iter_export_chunks(result['content']),
+            media_type=result['media_type'],
+            headers={
+                "Content-Disposition": f'attachment; filename="{result["filename"]}"',
+                "Content-Length": str(result['size'])
+            }
+        )
+    
     return result
 
 # Error handlers
@@ -429,12 +457,13 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     
     request_id = getattr(request.state, 'request_id', None)
     
-    return JSONResponse(
+    return Response(
         status_code=exc.status_code,
-        content=ErrorResponse.get(
+        content=ErrorResponse.get_bytes(
             exc.detail if isinstance(exc.detail, str) else "server_error",
             request_id
-        )
+        ),
+        media_type="application/json"
     )
 
 @app.exception_handler(Exception)
@@ -445,9 +474,10 @@ async def general_exception_handler(request: Request, exc: Exception):
     
     request_id = getattr(request.state, 'request_id', None)
     
-    return JSONResponse(
+    return Response(
         status_code=500,
-        content=ErrorResponse.get("server_error", request_id)
+        content=ErrorResponse.get_bytes("server_error", request_id),
+        media_type="application/json"
     )
 
 # Admin endpoints (protected)
@@ -469,7 +499,9 @@ async def get_system_metrics(
     # Get agent health
     if websocket_manager and hasattr(websocket_manager, 'adk'):
         try:
-            metrics["agent_health"] = await websocket_manager.adk.get_agent_health()
+            metrics["agent_health"] = await websocket_manager.get_agent_health(
+                ADMIN_METRICS_CACHE_TTL
+            )
         except Exception:
             pass
     
@@ -486,11 +518,21 @@ if __name__ == "__main__":
     host = os.getenv("API_HOST", "127.0.0.1")
     port = int(os.getenv("API_PORT", "8000"))
     
+    # uvloop and httptools come with uvicorn[standard]. uvicorn ignores
+    # workers when reload is on, so development runs a single process
+    reload = os.getenv('ENVIRONMENT') != 'production'
+    
     uvicorn.run(
         "src.api.main_enhanced:app",
         host=host,
         port=port,
-        reload=os.getenv('ENVIRONMENT') != 'production',
+        reload=reload,
+        workers=1 if reload else int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools",
         log_level="info",
-        access_log=True
+        access_log=True,
+        # Broadcasts are compressed once by the manager for clients that
+        # negotiate it, so per-peer deflate would only duplicate that work
+        ws_per_message_deflate=False
     )
\ No newline at end of file
@@ -5,9 +5,15 @@ from .rate_limiter import (
     WebSocketRateLimiter,
     OperationRateLimiter
 )
+from .cors import FrozenOriginCORSMiddleware
+from .compression import SelectiveGZipMiddleware
+from .parallax import ParallaxMiddleware
 
 __all__ = [
     'RateLimiter',
     'WebSocketRateLimiter',
-    'OperationRateLimiter'
+    'OperationRateLimiter',
+    'FrozenOriginCORSMiddleware',
+    'SelectiveGZipMiddleware',
+    'ParallaxMiddleware'
 ]
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+Compression middleware for Parallax Pal API
+
+Starlette's GZipMiddleware, skipped for responses whose media type is
+already compressed or streamed, such as export downloads.
+"""
+
+from starlette.middleware.gzip import GZipMiddleware
+
+# PDFs compress their streams and Office files are zip archives; gzipping
+# them again costs CPU for no size gain. Event streams must not be buffered.
+UNCOMPRESSED_MEDIA_TYPES = frozenset({
+    "application/pdf",
+    "application/zip",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "image/png",
+    "image/jpeg",
+    "text/event-stream"
+})
+
+
+class SelectiveGZipMiddleware:
+    """GZipMiddleware that passes excluded media types through untouched"""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 500,
+        compresslevel: int = 9,
+        exclude_media_types: frozenset = UNCOMPRESSED_MEDIA_TYPES
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.exclude_media_types = exclude_media_types
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def route_response(scope, receive, gzip_send):
+            # The media type is only known once the app starts its response,
+            # so the choice between gzip and the raw send is made there
+            target = gzip_send
+
+            async def route(message):
+                nonlocal target
+                if message["type"] == "http.response.start":
+                    headers = dict(message.get("headers", ()))
+                    media_type = headers.get(b"content-type", b"").split(b";", 1)[0]
+                    if media_type.strip().decode("latin-1") in self.exclude_media_types:
+                        target = send
+                await target(message)
+
+            await self.app(scope, receive, route)
+
+        gzip = GZipMiddleware(
+            route_response, minimum_size=self.minimum_size, compresslevel=self.compresslevel
+        )
+        await gzip(scope, receive, send)
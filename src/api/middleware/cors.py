@@ -0,0 +1,29 @@
+"""
+CORS middleware for Parallax Pal API
+
+Starlette's CORSMiddleware with constant-time origin checks.
+"""
+
+from starlette.middleware.cors import CORSMiddleware
+
+
+class FrozenOriginCORSMiddleware(CORSMiddleware):
+    """CORSMiddleware that matches origins against a frozenset instead of a list"""
+    
+    def __init__(self, app, **kwargs):
+        super().__init__(app, **kwargs)
+        # Starlette already prebuilds the preflight and simple response
+        # headers in __init__; only the origin lookup is a list scan
+        self._allowed_origin_set = frozenset(self.allow_origins)
+    
+    def is_allowed_origin(self, origin: str) -> bool:
+        if self.allow_all_origins:
+            return True
+        
+        if origin in self._allowed_origin_set:
+            return True
+        
+        return bool(
+            self.allow_origin_regex is not None
+            and self.allow_origin_regex.fullmatch(origin)
+        )
@@ -0,0 +1,89 @@
+"""
+Request middleware for Parallax Pal API
+
+Request IDs and rate limiting in a single pure-ASGI pass, without the task
+group and request/response wrapping that @app.middleware("http") adds.
+"""
+
+import logging
+import time
+from secrets import token_hex
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Probes, metrics scrapes and API docs are never rate limited
+RATE_LIMIT_EXEMPT_PATHS = frozenset({
+    "/health",
+    "/metrics",
+    "/api/docs",
+    "/api/openapi.json",
+    "/api/redoc"
+})
+
+
+class ParallaxMiddleware:
+    """Tag every HTTP request with an ID and apply the per-client rate limit"""
+
+    def __init__(self, app, max_requests: int = 60, window_seconds: int = 60):
+        self.app = app
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = token_hex(16)
+        scope.setdefault("state", {})["request_id"] = request_id
+        extra_headers = [(b"x-request-id", request_id.encode())]
+
+        path = scope["path"]
+        # CORS preflights are answered by CORSMiddleware and never count
+        exempt = path in RATE_LIMIT_EXEMPT_PATHS or scope["method"] == "OPTIONS"
+        # The limiter is created in the lifespan handler and kept on app.state
+        rate_limiter = None if exempt else getattr(scope["app"].state, "rate_limiter", None)
+
+        if rate_limiter:
+            request = Request(scope)
+            client_id = rate_limiter._get_client_id(request)
+            key = f"{client_id}:{path.replace('/', '_')}"
+
+            allowed, metadata = await rate_limiter.check_rate_limit(
+                key, self.max_requests, self.window_seconds
+            )
+
+            limit_headers = {
+                "X-RateLimit-Limit": str(metadata["limit"]),
+                "X-RateLimit-Remaining": str(metadata["remaining"]),
+                "X-RateLimit-Reset": str(metadata["reset"])
+            }
+
+            if not allowed:
+                logger.warning(f"Rate limit exceeded for {client_id} on {path}")
+                response = JSONResponse(
+                    {"detail": "Rate limit exceeded. Please try again later."},
+                    status_code=429,
+                    headers={
+                        **limit_headers,
+                        "Retry-After": str(metadata["reset"] - int(time.time())),
+                        "X-Request-ID": request_id
+                    }
+                )
+                await response(scope, receive, send)
+                return
+
+            extra_headers.extend(
+                (name.lower().encode(), value.encode())
+                for name, value in limit_headers.items()
+            )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *extra_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
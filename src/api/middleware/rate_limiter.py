@@ -5,8 +5,13 @@ Provides Redis-based rate limiting with configurable windows and limits.
 """
 
 from fastapi import Request, HTTPException
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Callable, Optional
 import redis.asyncio as redis
+import math
+import os
 import time
 import logging
 from datetime import datetime, timedelta
@@ -14,36 +19,156 @@ import hashlib
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on pooled Redis connections per process
+REDIS_POOL_MAX = int(os.getenv("REDIS_POOL_MAX", "64"))
+
+# Error text from servers that reject EVAL/EVALSHA
+LUA_UNAVAILABLE_ERRORS = ("unknown command", "not allowed", "disabled")
+
+# In-process cache of recent denials, so throttled clients are turned away
+# without a Redis round trip. Kept short so other replicas' state is not
+# second-guessed for long; allowed results are never cached locally.
+LOCAL_DENY_TTL = 1.0  # Seconds
+LOCAL_DENY_CACHE_SIZE = 50_000
+
+# Sliding-window check and update in one atomic round trip.
+# KEYS: window ZSET, burst counter
+# ARGV: now, window_start, max_requests, window_seconds, burst_size (0 = off)
+# Returns {allowed, remaining, reset, burst_exceeded}
+SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local max_requests = tonumber(ARGV[3])
+local window = tonumber(ARGV[4])
+local burst = tonumber(ARGV[5])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, ARGV[2])
+local count = redis.call('ZCARD', KEYS[1])
+
+if burst > 0 and tonumber(redis.call('GET', KEYS[2]) or '0') >= burst then
+    return {0, 0, math.floor(now + window), 1}
+end
+
+if count >= max_requests then
+    local reset = now + window
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    if oldest[2] then
+        reset = tonumber(oldest[2]) + window
+    end
+    return {0, 0, math.floor(reset), 0}
+end
+
+redis.call('ZADD', KEYS[1], now, ARGV[1])
+redis.call('EXPIRE', KEYS[1], window * 2)
+if burst > 0 then
+    redis.call('INCR', KEYS[2])
+    redis.call('EXPIRE', KEYS[2], 1)  -- 1 second burst window
+end
+return {1, max_requests - count - 1, math.floor(now + window), 0}
+"""
+
+# Token bucket: constant-size state per key instead of one ZSET member per request.
+# KEYS: bucket hash
+# ARGV: now_ms, capacity, refill tokens per ms, ttl_ms
+# Returns {allowed, tokens left (as a string, Lua would truncate the float)}
+TOKEN_BUCKET_LUA = """
+local now = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local rate = tonumber(ARGV[3])
+
+local state = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local last = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - last) * rate)
+
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return {allowed, tostring(tokens)}
+"""
+
+# Drop a WebSocket session and its connection count in one atomic round trip.
+# KEYS: connection counter, session set
+# ARGV: session_id
+# Returns the remaining connection count
+WS_UNREGISTER_LUA = """
+local n = redis.call('DECR', KEYS[1])
+if n <= 0 then
+    redis.call('DEL', KEYS[1])
+end
+redis.call('SREM', KEYS[2], ARGV[1])
+return n
+"""
+
+
+def _user_tag(user_id) -> str:
+    """Redis Cluster hash tag, so all of a user's keys share one slot"""
+    return f"{{user:{user_id}}}"
+
+
+@lru_cache(maxsize=100_000)
+def _hash_id(client_ip: str, user_agent: str) -> str:
+    """Anonymous client key; not a security boundary, so blake2b is enough"""
+    identifier = f"{client_ip}:{user_agent}"
+    return hashlib.blake2b(identifier.encode(), digest_size=8).hexdigest()
+
 
 class RateLimiter:
-    """Redis-based rate limiter with sliding window"""
+    """Redis-based rate limiter using a token bucket or a strict sliding window"""
     
-    def __init__(self, redis_url: str = "redis://localhost:6379"):
+    def __init__(self, redis_url: str = "redis://localhost:6379", sliding_window: bool = False):
         """
         Initialize rate limiter
         
         Args:
             redis_url: Redis connection URL
+            sliding_window: Use the exact ZSET sliding window instead of the
+                token bucket; costs one ZSET member per request in the window
         """
         self.redis_url = redis_url
+        self.sliding_window = sliding_window
+        self._pool: Optional[redis.BlockingConnectionPool] = None
         self._redis: Optional[redis.Redis] = None
+        self._sliding_window = None
+        self._token_bucket = None
+        self._ws_unregister = None
+        # Cleared if the server rejects scripting (e.g. EVAL disabled on a
+        # managed Redis); checks then use the pipelined sliding window
+        self._lua_available = True
+        # key -> (deny_until, metadata), oldest first for eviction
+        self._local_denials: OrderedDict[str, tuple[float, dict]] = OrderedDict()
     
     async def get_redis(self) -> redis.Redis:
         """Get or create Redis connection"""
         if not self._redis:
-            self._redis = await redis.from_url(
+            # Concurrent checks run on separate pooled connections; once
+            # REDIS_POOL_MAX are busy, callers wait for one to free up
+            self._pool = redis.BlockingConnectionPool.from_url(
                 self.redis_url,
+                max_connections=REDIS_POOL_MAX,
+                timeout=5,
                 decode_responses=True,
                 socket_connect_timeout=5,
                 socket_timeout=5
             )
+            self._redis = redis.Redis(connection_pool=self._pool)
+            # Sent by EVALSHA, falling back to EVAL once if the script is not cached
+            self._sliding_window = self._redis.register_script(SLIDING_WINDOW_LUA)
+            self._token_bucket = self._redis.register_script(TOKEN_BUCKET_LUA)
+            self._ws_unregister = self._redis.register_script(WS_UNREGISTER_LUA)
         return self._redis
     
     async def close(self):
         """Close Redis connection"""
         if self._redis:
             await self._redis.close()
+            await self._pool.disconnect()
             self._redis = None
+            self._pool = None
+        self._local_denials.clear()
     
     def _get_client_id(self, request: Request) -> str:
         """
@@ -53,25 +178,25 @@ class RateLimiter:
         1. Authenticated user ID
         2. API key
         3. IP address + User-Agent hash
+        
+        The identifier is wrapped in a Redis Cluster hash tag; keys built
+        from it land on one slot, so multi-key scripts stay valid.
         """
         # Check for authenticated user
         if hasattr(request.state, "user") and request.state.user:
-            return f"user:{request.state.user.id}"
+            return _user_tag(request.state.user.id)
         
         # Check for API key
         api_key = request.headers.get("X-API-Key")
         if api_key:
-            return f"api:{api_key[:16]}"  # Use prefix only for privacy
+            return f"{{api:{api_key[:16]}}}"  # Use prefix only for privacy
         
         # Fall back to IP + User-Agent
         client_ip = request.client.host if request.client else "unknown"
         user_agent = request.headers.get("User-Agent", "unknown")
         
-        # Create hash for privacy
-        identifier = f"{client_ip}:{user_agent}"
-        id_hash = hashlib.sha256(identifier.encode()).hexdigest()[:16]
-        
-        return f"ip:{id_hash}"
+        # Hash for privacy; repeat clients hit the cache
+        return f"{{ip:{_hash_id(client_ip, user_agent)}}}"
     
     async def check_rate_limit(
         self, 
@@ -81,79 +206,207 @@ class RateLimiter:
         burst_size: Optional[int] = None
     ) -> tuple[bool, dict]:
         """
-        Check if rate limit is exceeded using sliding window
+        Check if rate limit is exceeded
         
         Args:
             key: Rate limit key
             max_requests: Maximum requests allowed in window
             window_seconds: Time window in seconds
-            burst_size: Optional burst allowance
+            burst_size: Optional burst allowance; with the token bucket this
+                is the bucket capacity (defaults to max_requests)
             
         Returns:
             Tuple of (allowed, metadata)
         """
-        redis_client = await self.get_redis()
-        
         now = time.time()
+        
+        # A client denied moments ago is still denied; answer without Redis
+        denial = self._local_denials.get(key)
+        if denial:
+            deny_until, metadata = denial
+            if deny_until > now:
+                return False, metadata
+            del self._local_denials[key]
+        
+        await self.get_redis()  # Also registers the Lua scripts
+        
+        if self.sliding_window or not self._lua_available:
+            allowed, metadata = await self._check_sliding_window(
+                key, now, max_requests, window_seconds, burst_size
+            )
+        else:
+            allowed, metadata = await self._check_token_bucket(
+                key, now, max_requests, window_seconds, burst_size
+            )
+        
+        if not allowed:
+            self._remember_denial(key, now, metadata)
+        return allowed, metadata
+    
+    def _remember_denial(self, key: str, now: float, metadata: dict):
+        """Cache a denial locally until the reset time, capped at LOCAL_DENY_TTL"""
+        deny_until = min(now + LOCAL_DENY_TTL, metadata["reset"])
+        if deny_until <= now:
+            return
+        self._local_denials[key] = (deny_until, metadata)
+        self._local_denials.move_to_end(key)
+        if len(self._local_denials) > LOCAL_DENY_CACHE_SIZE:
+            self._local_denials.popitem(last=False)
+    
+    async def _check_sliding_window(
+        self,
+        key: str,
+        now: float,
+        max_requests: int,
+        window_seconds: int,
+        burst_size: Optional[int]
+    ) -> tuple[bool, dict]:
+        """Exact sliding-window check over a ZSET of request timestamps"""
         window_start = now - window_seconds
         
         # Sliding window key
         window_key = f"rate_limit:{key}:{int(now // window_seconds)}"
         
         try:
-            # Remove old entries
-            await redis_client.zremrangebyscore(window_key, 0, window_start)
-            
-            # Count requests in current window
-            request_count = await redis_client.zcard(window_key)
-            
-            # Check burst if configured
-            if burst_size:
-                burst_key = f"burst:{key}"
-                burst_count = await redis_client.get(burst_key)
-                if burst_count and int(burst_count) >= burst_size:
-                    return False, {
-                        "limit": max_requests,
-                        "remaining": 0,
-                        "reset": int(now + window_seconds),
-                        "burst_exceeded": True
-                    }
-            
-            # Check rate limit
-            if request_count >= max_requests:
-                # Calculate when the oldest request will expire
-                oldest_request = await redis_client.zrange(
-                    window_key, 0, 0, withscores=True
+            if not self._lua_available:
+                return await self._check_sliding_window_pipelined(
+                    window_key, f"burst:{key}", now, window_start,
+                    max_requests, window_seconds, burst_size
                 )
-                if oldest_request:
-                    reset_time = oldest_request[0][1] + window_seconds
-                else:
-                    reset_time = now + window_seconds
-                
-                return False, {
-                    "limit": max_requests,
-                    "remaining": 0,
-                    "reset": int(reset_time)
-                }
             
-            # Add current request
-            await redis_client.zadd(window_key, {str(now): now})
-            await redis_client.expire(window_key, window_seconds * 2)
+            allowed, remaining, reset, burst_exceeded = await self._sliding_window(
+                keys=[window_key, f"burst:{key}"],
+                args=[now, window_start, max_requests, window_seconds, burst_size or 0]
+            )
             
-            # Update burst counter if needed
-            if burst_size:
-                burst_key = f"burst:{key}"
-                await redis_client.incr(burst_key)
-                await redis_client.expire(burst_key, 1)  # 1 second burst window
+            metadata = {
+                "limit": max_requests,
+                "remaining": remaining,
+                "reset": reset
+            }
+            if burst_exceeded:
+                metadata["burst_exceeded"] = True
             
-            remaining = max_requests - request_count - 1
+            return bool(allowed), metadata
             
+        except redis.ResponseError as e:
+            if self._disable_lua(e):
+                return await self._check_sliding_window(
+                    key, now, max_requests, window_seconds, burst_size
+                )
+            logger.error(f"Redis error in rate limiting: {e}")
             return True, {
                 "limit": max_requests,
-                "remaining": remaining,
-                "reset": int(now + window_seconds)
+                "remaining": -1,
+                "reset": -1,
+                "redis_error": True
+            }
+        except redis.RedisError as e:
+            # Log error but don't block requests if Redis is down
+            logger.error(f"Redis error in rate limiting: {e}")
+            return True, {
+                "limit": max_requests,
+                "remaining": -1,
+                "reset": -1,
+                "redis_error": True
+            }
+    
+    def _disable_lua(self, error: Exception) -> bool:
+        """Switch to pipelined checks if ``error`` means scripting is unavailable"""
+        message = str(error).lower()
+        if not any(reason in message for reason in LUA_UNAVAILABLE_ERRORS):
+            return False
+        logger.warning(f"Lua scripting unavailable, using pipelined rate limiting: {error}")
+        self._lua_available = False
+        return True
+    
+    async def _check_sliding_window_pipelined(
+        self,
+        window_key: str,
+        burst_key: str,
+        now: float,
+        window_start: float,
+        max_requests: int,
+        window_seconds: int,
+        burst_size: Optional[int]
+    ) -> tuple[bool, dict]:
+        """
+        Sliding-window check without Lua, batched into two round trips
+        
+        Not atomic: concurrent requests may both pass the count check.
+        """
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.zremrangebyscore(window_key, 0, window_start)
+        pipe.zcard(window_key)
+        pipe.zrange(window_key, 0, 0, withscores=True)
+        if burst_size:
+            pipe.get(burst_key)
+        results = await pipe.execute()
+        request_count, oldest_request = results[1], results[2]
+        
+        if burst_size and results[3] and int(results[3]) >= burst_size:
+            return False, {
+                "limit": max_requests,
+                "remaining": 0,
+                "reset": int(now + window_seconds),
+                "burst_exceeded": True
+            }
+        
+        if request_count >= max_requests:
+            # Calculate when the oldest request will expire
+            if oldest_request:
+                reset_time = oldest_request[0][1] + window_seconds
+            else:
+                reset_time = now + window_seconds
+            return False, {
+                "limit": max_requests,
+                "remaining": 0,
+                "reset": int(reset_time)
+            }
+        
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.zadd(window_key, {str(now): now})
+        pipe.expire(window_key, window_seconds * 2)
+        if burst_size:
+            pipe.incr(burst_key)
+            pipe.expire(burst_key, 1)  # 1 second burst window
+        await pipe.execute()
+        
+        return True, {
+            "limit": max_requests,
+            "remaining": max_requests - request_count - 1,
+            "reset": int(now + window_seconds)
+        }
+    
+    async def _check_token_bucket(
+        self,
+        key: str,
+        now: float,
+        max_requests: int,
+        window_seconds: int,
+        burst_size: Optional[int]
+    ) -> tuple[bool, dict]:
+        """Token-bucket check refilling max_requests tokens per window"""
+        capacity = burst_size or max_requests
+        rate = max_requests / window_seconds  # Tokens per second
+        
+        try:
+            allowed, tokens = await self._token_bucket(
+                keys=[f"rl:{key}"],
+                args=[int(now * 1000), capacity, rate / 1000, window_seconds * 2000]
+            )
+        except redis.ResponseError as e:
+            if self._disable_lua(e):
+                return await self._check_sliding_window(
+                    key, now, max_requests, window_seconds, burst_size
+                )
+            logger.error(f"Redis error in rate limiting: {e}")
+            return True, {
+                "limit": max_requests,
+                "remaining": -1,
+                "reset": -1,
+                "redis_error": True
             }
-            
         except redis.RedisError as e:
             # Log error but don't block requests if Redis is down
             logger.error(f"Redis error in rate limiting: {e}")
@@ -163,6 +416,15 @@ class RateLimiter:
                 "reset": -1,
                 "redis_error": True
             }
+        
+        tokens = float(tokens)
+        # Denied: when the next token arrives; allowed: when the bucket is full again
+        wait = (capacity - tokens) / rate if allowed else (1 - tokens) / rate
+        return bool(allowed), {
+            "limit": max_requests,
+            "remaining": int(tokens),
+            "reset": math.ceil(now + wait)
+        }
     
     def middleware(
         self, 
@@ -257,7 +519,7 @@ class WebSocketRateLimiter:
         redis_client = await self.rate_limiter.get_redis()
         
         # Check concurrent connections
-        conn_key = f"ws_connections:{user_id}"
+        conn_key = f"{_user_tag(user_id)}:ws_connections"
         current_connections = await redis_client.get(conn_key)
         
         if current_connections and int(current_connections) >= max_connections:
@@ -265,7 +527,7 @@ class WebSocketRateLimiter:
         
         # Check message rate
         allowed, _ = await self.rate_limiter.check_rate_limit(
-            f"ws_messages:{user_id}",
+            f"{_user_tag(user_id)}:ws_messages",
             max_messages_per_minute,
             60  # 1 minute window
         )
@@ -279,58 +541,71 @@ class WebSocketRateLimiter:
         """Register a new WebSocket connection"""
         redis_client = await self.rate_limiter.get_redis()
         
-        conn_key = f"ws_connections:{user_id}"
-        sessions_key = f"ws_sessions:{user_id}"
-        
-        # Increment connection count
-        await redis_client.incr(conn_key)
-        await redis_client.expire(conn_key, 3600)  # 1 hour expiry
+        tag = _user_tag(user_id)
+        conn_key = f"{tag}:ws_connections"
+        sessions_key = f"{tag}:ws_sessions"
         
-        # Track session
-        await redis_client.sadd(sessions_key, session_id)
-        await redis_client.expire(sessions_key, 3600)
+        # Count the connection and track the session in one round trip
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.incr(conn_key)
+        pipe.expire(conn_key, 3600)  # 1 hour expiry
+        pipe.sadd(sessions_key, session_id)
+        pipe.expire(sessions_key, 3600)
+        await pipe.execute()
     
     async def unregister_connection(self, user_id: str, session_id: str):
         """Unregister a WebSocket connection"""
         redis_client = await self.rate_limiter.get_redis()
         
-        conn_key = f"ws_connections:{user_id}"
-        sessions_key = f"ws_sessions:{user_id}"
+        tag = _user_tag(user_id)
+        conn_key = f"{tag}:ws_connections"
+        sessions_key = f"{tag}:ws_sessions"
+        
+        if self.rate_limiter._lua_available:
+            try:
+                await self.rate_limiter._ws_unregister(
+                    keys=[conn_key, sessions_key],
+                    args=[session_id]
+                )
+                return
+            except redis.ResponseError as e:
+                if not self.rate_limiter._disable_lua(e):
+                    raise
         
-        # Decrement connection count
-        count = await redis_client.decr(conn_key)
+        # Decrement connection count and remove session
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.decr(conn_key)
+        pipe.srem(sessions_key, session_id)
+        count, _ = await pipe.execute()
         if count <= 0:
             await redis_client.delete(conn_key)
-        
-        # Remove session
-        await redis_client.srem(sessions_key, session_id)
 
 
 # Specialized rate limiters for different operations
 class OperationRateLimiter:
     """Specialized rate limits for different operations"""
     
-    # Rate limit configurations
-    LIMITS = {
-        "research_query": {
+    # Rate limit configurations (read-only)
+    LIMITS = MappingProxyType({
+        "research_query": MappingProxyType({
             "free": (10, 3600),      # 10 per hour
             "basic": (50, 3600),     # 50 per hour
             "pro": (200, 3600),      # 200 per hour
             "enterprise": (1000, 3600)  # 1000 per hour
-        },
-        "export": {
+        }),
+        "export": MappingProxyType({
             "free": (5, 86400),      # 5 per day
             "basic": (20, 86400),    # 20 per day
             "pro": (100, 86400),     # 100 per day
             "enterprise": (500, 86400)  # 500 per day
-        },
-        "knowledge_graph": {
+        }),
+        "knowledge_graph": MappingProxyType({
             "free": (20, 3600),      # 20 per hour
             "basic": (100, 3600),    # 100 per hour
             "pro": (500, 3600),      # 500 per hour
             "enterprise": (2000, 3600)  # 2000 per hour
-        }
-    }
+        })
+    })
     
     def __init__(self, rate_limiter: RateLimiter):
         self.rate_limiter = rate_limiter
@@ -343,15 +618,16 @@ class OperationRateLimiter:
     ) -> tuple[bool, dict]:
         """Check if user can perform operation based on their tier"""
         
-        if operation not in self.LIMITS:
+        tier_limits = self.LIMITS.get(operation)
+        if tier_limits is None:
             return True, {"allowed": True}
         
-        if tier not in self.LIMITS[operation]:
+        if tier not in tier_limits:
             tier = "free"
         
-        limit, window = self.LIMITS[operation][tier]
+        limit, window = tier_limits[tier]
         
-        key = f"op:{operation}:{user_id}"
+        key = f"{_user_tag(user_id)}:op:{operation}"
         allowed, metadata = await self.rate_limiter.check_rate_limit(
             key, limit, window
         )
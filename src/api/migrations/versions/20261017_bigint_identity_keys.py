@@ -0,0 +1,57 @@
+"""BIGINT identity keys with cached sequences for insert-heavy tables
+
+Revision ID: 20261017_bigint_identity_keys
+Revises: 20261017_brin_time_indexes
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = '20261017_bigint_identity_keys'
+down_revision = '20261017_brin_time_indexes'
+branch_labels = None
+depends_on = None
+
+# Each backend reserves this many ids per sequence access
+IDENTITY_CACHE = 1000
+
+TABLES = ['audit_logs', 'transactions', 'research_sources', 'model_results', 'research_analytics']
+
+# Foreign keys that must widen with the keys they reference
+REFERENCING_COLUMNS = [
+    ('query_purchases', 'transaction_id'),
+    ('model_results', 'source_id'),
+]
+
+def upgrade() -> None:
+    # Rewrites each table under an exclusive lock
+    for table, column in REFERENCING_COLUMNS:
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE bigint')
+
+    for table in TABLES:
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN id TYPE bigint')
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT')
+        op.execute(f'DROP SEQUENCE IF EXISTS {table}_id_seq')
+        op.execute(
+            f'ALTER TABLE {table} ALTER COLUMN id '
+            f'ADD GENERATED BY DEFAULT AS IDENTITY (CACHE {IDENTITY_CACHE})'
+        )
+        # Continue numbering after the existing rows
+        op.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+        )
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN id DROP IDENTITY')
+        op.execute(f'CREATE SEQUENCE {table}_id_seq OWNED BY {table}.id')
+        op.execute(
+            f"SELECT setval('{table}_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+        )
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN id TYPE integer')
+
+    for table, column in REFERENCING_COLUMNS:
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE integer')
@@ -0,0 +1,40 @@
+"""BRIN indexes on append-only timestamp columns
+
+Revision ID: 20261017_brin_time_indexes
+Revises: 20261017_jsonb_columns
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = '20261017_brin_time_indexes'
+down_revision = '20261017_jsonb_columns'
+branch_labels = None
+depends_on = None
+
+# Rows are inserted in time order, so each 32-page range stores one
+# (min, max) pair. Per-user tailing keeps its (user_id, time DESC) btrees.
+BRIN_INDEXES = [
+    ('brin_audit_logs_timestamp', 'audit_logs', 'timestamp'),
+    ('brin_transactions_created_at', 'transactions', 'created_at'),
+    ('brin_query_purchases_created_at', 'query_purchases', 'created_at'),
+    ('brin_research_sources_processed_at', 'research_sources', 'processed_at'),
+]
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, column in BRIN_INDEXES:
+            op.create_index(
+                name,
+                table,
+                [column],
+                postgresql_using='brin',
+                postgresql_with={'pages_per_range': 32},
+                postgresql_concurrently=True
+            )
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in BRIN_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,35 @@
+"""Case-insensitive user emails via CITEXT
+
+Revision ID: 20261017_citext_email
+Revises: 20261017_bigint_identity_keys
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic
+revision = '20261017_citext_email'
+down_revision = '20261017_bigint_identity_keys'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS citext')
+    # The unique constraint is rebuilt case-insensitively; this fails if
+    # two accounts differ only in email case, which must be merged first
+    op.alter_column(
+        'users', 'email',
+        type_=postgresql.CITEXT(),
+        existing_type=sa.String(),
+        existing_nullable=False
+    )
+
+def downgrade() -> None:
+    op.alter_column(
+        'users', 'email',
+        type_=sa.String(),
+        existing_type=postgresql.CITEXT(),
+        existing_nullable=False
+    )
@@ -0,0 +1,82 @@
+"""Keep remaining query credits on users instead of a query_credits table
+
+Revision ID: 20261017_inline_query_credits
+Revises: 20261017_partition_audit_logs
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '20261017_inline_query_credits'
+down_revision = '20261017_partition_audit_logs'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('remaining_queries', sa.Integer(),
+                                     server_default='0', nullable=False))
+    op.execute("""
+        UPDATE users SET remaining_queries = credits.remaining
+        FROM (
+            SELECT user_id, COALESCE(SUM(remaining_queries), 0) AS remaining
+            FROM query_credits
+            GROUP BY user_id
+        ) AS credits
+        WHERE credits.user_id = users.id
+    """)
+
+    # Usage rows now point at the user directly
+    if sa.inspect(op.get_bind()).has_table('query_usage'):
+        op.add_column('query_usage', sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')))
+        op.execute("""
+            UPDATE query_usage SET user_id = query_credits.user_id
+            FROM query_credits
+            WHERE query_credits.id = query_usage.credit_id
+        """)
+        op.execute('DROP INDEX IF EXISTS ix_query_usage_credit')
+        op.drop_column('query_usage', 'credit_id')
+    else:
+        op.create_table(
+            'query_usage',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('task_id', sa.Integer(), nullable=True),
+            sa.Column('used_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.ForeignKeyConstraint(['task_id'], ['research_tasks.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    op.create_index('ix_query_usage_user', 'query_usage', ['user_id', sa.text('used_at DESC')])
+
+    op.drop_index('ix_query_credits_user', table_name='query_credits')
+    op.drop_table('query_credits')
+
+def downgrade() -> None:
+    op.create_table(
+        'query_credits',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('remaining_queries', sa.Integer(), default=0),
+        sa.Column('last_updated', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_query_credits_user', 'query_credits', ['user_id'])
+    op.execute("""
+        INSERT INTO query_credits (user_id, remaining_queries)
+        SELECT id, remaining_queries FROM users
+    """)
+
+    op.drop_index('ix_query_usage_user', table_name='query_usage')
+    op.add_column('query_usage', sa.Column('credit_id', sa.Integer(), sa.ForeignKey('query_credits.id')))
+    op.execute("""
+        UPDATE query_usage SET credit_id = query_credits.id
+        FROM query_credits
+        WHERE query_credits.user_id = query_usage.user_id
+    """)
+    op.drop_column('query_usage', 'user_id')
+    op.create_index('ix_query_usage_credit', 'query_usage', ['credit_id', sa.text('used_at DESC')])
+
+    op.drop_column('users', 'remaining_queries')
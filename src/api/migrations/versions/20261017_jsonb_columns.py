@@ -0,0 +1,62 @@
+"""Store JSON columns as JSONB with lz4 TOAST compression
+
+Revision ID: 20261017_jsonb_columns
+Revises: 20261017_research_task_status_covering_index
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic
+revision = '20261017_jsonb_columns'
+down_revision = '20261017_research_task_status_covering_index'
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = [
+    ('subscription_plans', 'features'),
+    ('transactions', 'metadata'),
+    ('research_tasks', 'web_results'),
+    ('research_tasks', 'ai_analyses'),
+]
+
+# Large documents; lz4 (PostgreSQL 14+) is much cheaper than pglz to
+# (de)compress. Applies to values written from now on.
+LZ4_COLUMNS = JSON_COLUMNS[1:]
+
+def upgrade() -> None:
+    # The type change rewrites each table under an exclusive lock
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=postgresql.JSONB(),
+            existing_type=postgresql.JSON(),
+            postgresql_using=f'{column}::jsonb'
+        )
+    for table, column in LZ4_COLUMNS:
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} SET COMPRESSION lz4')
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_research_tasks_ai_analyses_gin',
+            'research_tasks',
+            ['ai_analyses'],
+            postgresql_using='gin',
+            postgresql_concurrently=True
+        )
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_research_tasks_ai_analyses_gin', table_name='research_tasks',
+                      postgresql_concurrently=True)
+
+    for table, column in LZ4_COLUMNS:
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} SET COMPRESSION default')
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=postgresql.JSON(),
+            existing_type=postgresql.JSONB(),
+            postgresql_using=f'{column}::json'
+        )
@@ -0,0 +1,106 @@
+"""Partition audit_logs by month on timestamp
+
+Revision ID: 20261017_partition_audit_logs
+Revises: 20261017_citext_email
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = '20261017_partition_audit_logs'
+down_revision = '20261017_citext_email'
+branch_labels = None
+depends_on = None
+
+# Monthly partitions from the initial schema through a year ahead; later
+# months are created by the API's partition maintenance task, and anything
+# outside every range lands in audit_logs_default
+FIRST_MONTH = date(2025, 2, 1)
+LAST_MONTH = date(2027, 10, 1)
+
+def _months(start: date, end: date):
+    month = start
+    while month <= end:
+        following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        yield month, following
+        month = following
+
+def upgrade() -> None:
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned')
+    op.execute('ALTER INDEX ix_audit_logs_user_timestamp RENAME TO ix_audit_logs_unpartitioned_user_timestamp')
+    op.execute('DROP INDEX IF EXISTS brin_audit_logs_timestamp')
+
+    # The partition key must be part of the primary key. ip_address and
+    # user_agent are optional, as in the model; not every event has a client
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY (CACHE 1000),
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            action VARCHAR NOT NULL,
+            resource_type VARCHAR NOT NULL,
+            resource_id INTEGER NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            ip_address VARCHAR,
+            user_agent VARCHAR,
+            details TEXT,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    for start, end in _months(FIRST_MONTH, LAST_MONTH):
+        op.execute(
+            f"CREATE TABLE audit_logs_{start:%Y_%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    op.execute('CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT')
+
+    # Created on the parent, so every partition gets its own copy
+    op.execute('CREATE INDEX ix_audit_logs_user_timestamp ON audit_logs (user_id, timestamp DESC)')
+    op.execute('CREATE INDEX brin_audit_logs_timestamp ON audit_logs '
+               'USING brin (timestamp) WITH (pages_per_range = 32)')
+
+    op.execute("""
+        INSERT INTO audit_logs (id, user_id, action, resource_type, resource_id,
+                                timestamp, ip_address, user_agent, details)
+        SELECT id, user_id, action, resource_type, resource_id,
+               COALESCE(timestamp, now()), ip_address, user_agent, details
+        FROM audit_logs_unpartitioned
+    """)
+    op.execute("SELECT setval(pg_get_serial_sequence('audit_logs', 'id'), "
+               "COALESCE(MAX(id), 0) + 1, false) FROM audit_logs")
+    op.execute('DROP TABLE audit_logs_unpartitioned')
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_partitioned')
+    op.execute('ALTER INDEX ix_audit_logs_user_timestamp RENAME TO ix_audit_logs_partitioned_user_timestamp')
+    op.execute('ALTER INDEX brin_audit_logs_timestamp RENAME TO brin_audit_logs_partitioned_timestamp')
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY (CACHE 1000) PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            action VARCHAR NOT NULL,
+            resource_type VARCHAR NOT NULL,
+            resource_id INTEGER NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            ip_address VARCHAR,
+            user_agent VARCHAR,
+            details TEXT
+        )
+    """)
+    op.execute("""
+        INSERT INTO audit_logs
+        SELECT id, user_id, action, resource_type, resource_id,
+               timestamp, ip_address, user_agent, details
+        FROM audit_logs_partitioned
+    """)
+    op.execute("SELECT setval(pg_get_serial_sequence('audit_logs', 'id'), "
+               "COALESCE(MAX(id), 0) + 1, false) FROM audit_logs")
+    # Dropping the parent drops every partition
+    op.execute('DROP TABLE audit_logs_partitioned')
+
+    op.execute('CREATE INDEX ix_audit_logs_user_timestamp ON audit_logs (user_id, timestamp DESC)')
+    op.execute('CREATE INDEX brin_audit_logs_timestamp ON audit_logs '
+               'USING brin (timestamp) WITH (pages_per_range = 32)')
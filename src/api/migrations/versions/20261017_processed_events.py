@@ -0,0 +1,29 @@
+"""Processed Stripe webhook events
+
+Revision ID: 20261017_processed_events
+Revises: 20261017_refresh_token_cleanup
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '20261017_processed_events'
+down_revision = '20261017_refresh_token_cleanup'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Stripe delivers events at least once; the primary key on the event ID
+    # makes webhook processing idempotent
+    op.create_table(
+        'processed_events',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('type', sa.String(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+def downgrade() -> None:
+    op.drop_table('processed_events')
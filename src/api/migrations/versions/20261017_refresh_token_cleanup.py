@@ -0,0 +1,28 @@
+"""Partial index for active refresh tokens
+
+Revision ID: 20261017_refresh_token_cleanup
+Revises: 20250222_initial
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '20261017_refresh_token_cleanup'
+down_revision = '20250222_initial'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Index only tokens that have not been rotated; expired rows are purged
+    # periodically by the API so the index stays bounded to live tokens
+    op.create_index(
+        'ix_refresh_tokens_user_active',
+        'refresh_tokens',
+        ['user_id', 'expires_at'],
+        postgresql_where=sa.text('replaced_by IS NULL')
+    )
+
+def downgrade() -> None:
+    op.drop_index('ix_refresh_tokens_user_active', table_name='refresh_tokens')
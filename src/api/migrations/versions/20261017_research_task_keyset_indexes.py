@@ -0,0 +1,51 @@
+"""Keyset pagination indexes for research task lists
+
+Revision ID: 20261017_research_task_keyset_indexes
+Revises: 20261017_subscription_covering_index
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '20261017_research_task_keyset_indexes'
+down_revision = '20261017_subscription_covering_index'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Built concurrently so research_tasks stays writable during the rebuild
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_research_tasks_owner_created_keyset',
+            'research_tasks',
+            ['owner_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True
+        )
+        op.drop_index('ix_research_tasks_owner_created', table_name='research_tasks',
+                      postgresql_concurrently=True)
+        op.execute('ALTER INDEX ix_research_tasks_owner_created_keyset '
+                   'RENAME TO ix_research_tasks_owner_created')
+        # Admin list spans all owners
+        op.create_index(
+            'ix_research_tasks_created',
+            'research_tasks',
+            [sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True
+        )
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_research_tasks_created', table_name='research_tasks',
+                      postgresql_concurrently=True)
+        op.create_index(
+            'ix_research_tasks_owner_created_plain',
+            'research_tasks',
+            ['owner_id', sa.text('created_at DESC')],
+            postgresql_concurrently=True
+        )
+        op.drop_index('ix_research_tasks_owner_created', table_name='research_tasks',
+                      postgresql_concurrently=True)
+        op.execute('ALTER INDEX ix_research_tasks_owner_created_plain '
+                   'RENAME TO ix_research_tasks_owner_created')
@@ -0,0 +1,43 @@
+"""Covering index for research task lists filtered by status
+
+Revision ID: 20261017_research_task_status_covering_index
+Revises: 20261017_research_task_keyset_indexes
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '20261017_research_task_status_covering_index'
+down_revision = '20261017_research_task_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+# ix_research_tasks_owner_created stays: keyset pagination over all of an
+# owner's tasks has no status filter. The standalone status index has no
+# queries of its own and is subsumed by the composite.
+
+def upgrade() -> None:
+    # Built concurrently so research_tasks stays writable during the rebuild
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_research_tasks_owner_status_created',
+            'research_tasks',
+            ['owner_id', 'status', sa.text('created_at DESC')],
+            postgresql_include=['id', 'completed_at'],
+            postgresql_concurrently=True
+        )
+        op.drop_index('ix_research_tasks_status', table_name='research_tasks',
+                      postgresql_concurrently=True)
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_research_tasks_status',
+            'research_tasks',
+            ['status'],
+            postgresql_concurrently=True
+        )
+        op.drop_index('ix_research_tasks_owner_status_created', table_name='research_tasks',
+                      postgresql_concurrently=True)
@@ -0,0 +1,45 @@
+"""Covering index for subscription lookups by user
+
+Revision ID: 20261017_subscription_covering_index
+Revises: 20261017_processed_events
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = '20261017_subscription_covering_index'
+down_revision = '20261017_processed_events'
+branch_labels = None
+depends_on = None
+
+# refresh_tokens.token and subscriptions.stripe_subscription_id are already
+# covered by the unique constraints from the initial schema
+
+def upgrade() -> None:
+    # Built concurrently so subscriptions stays writable during the rebuild
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_subscriptions_user_status_covering',
+            'subscriptions',
+            ['user_id', 'status'],
+            postgresql_include=['cancel_at_period_end', 'current_period_end', 'plan_id'],
+            postgresql_concurrently=True
+        )
+        op.drop_index('ix_subscriptions_user_status', table_name='subscriptions',
+                      postgresql_concurrently=True)
+        op.execute('ALTER INDEX ix_subscriptions_user_status_covering '
+                   'RENAME TO ix_subscriptions_user_status')
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_subscriptions_user_status_plain',
+            'subscriptions',
+            ['user_id', 'status'],
+            postgresql_concurrently=True
+        )
+        op.drop_index('ix_subscriptions_user_status', table_name='subscriptions',
+                      postgresql_concurrently=True)
+        op.execute('ALTER INDEX ix_subscriptions_user_status_plain '
+                   'RENAME TO ix_subscriptions_user_status')
@@ -1,6 +1,7 @@
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text, DateTime, Enum, Float, JSON, ARRAY
+from sqlalchemy import BigInteger, Boolean, Column, ForeignKey, Integer, String, Text, DateTime, Float, ARRAY, Identity
+from sqlalchemy.dialects.postgresql import CITEXT, ENUM as PGEnum, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -41,20 +42,51 @@ class AIModelType(str, PyEnum):
     GEMINI = "gemini"
     OLLAMA = "ollama"
 
+def _pg_enum(enum_class, name: str) -> PGEnum:
+    """
+    Native Postgres enum bound to the type the initial migration creates
+
+    Stores member values (``'pending'``), matching the migration's labels,
+    and never emits CREATE TYPE; Alembic owns the type lifecycle.
+    """
+    return PGEnum(
+        enum_class,
+        name=name,
+        create_type=False,
+        values_callable=lambda members: [member.value for member in members]
+    )
+
+async def _copy_records(session, model, rows) -> None:
+    """
+    Write rows with COPY on the session's asyncpg connection
+
+    Runs inside the session's transaction; the caller commits. Used for
+    append-only tables where per-row INSERTs dominate the write cost.
+    """
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        model.__tablename__,
+        records=rows,
+        columns=model.COPY_COLUMNS
+    )
+
 class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True)
+    email = Column(CITEXT, unique=True, index=True)  # Compared case-insensitively
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)
-    role = Column(Enum(UserRole), default=UserRole.RESEARCHER)
+    role = Column(_pg_enum(UserRole, 'user_role'), default=UserRole.RESEARCHER)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     last_login = Column(DateTime(timezone=True), nullable=True)
     mfa_secret = Column(String, nullable=True)
     is_mfa_enabled = Column(Boolean, default=False)
     stripe_customer_id = Column(String, nullable=True)
+    # Purchased research queries left, kept on the user row
+    remaining_queries = Column(Integer, default=0, server_default="0", nullable=False)
     
     # Relationships
     research_tasks = relationship("ResearchTask", back_populates="owner")
@@ -73,7 +105,7 @@ class SubscriptionPlan(Base):
     price = Column(Float)  # Price in USD
     interval = Column(String)  # 'month' or 'year'
     stripe_price_id = Column(String, unique=True)
-    features = Column(JSON)  # Store features as JSON
+    features = Column(JSONB)  # Store features as JSON
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -89,7 +121,7 @@ class Subscription(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     plan_id = Column(Integer, ForeignKey("subscription_plans.id"))
     stripe_subscription_id = Column(String, unique=True)
-    status = Column(Enum(SubscriptionStatus))
+    status = Column(_pg_enum(SubscriptionStatus, 'subscription_status'))
     current_period_start = Column(DateTime(timezone=True))
     current_period_end = Column(DateTime(timezone=True))
     cancel_at_period_end = Column(Boolean, default=False)
@@ -99,7 +131,8 @@ class Subscription(Base):
 
     # Relationships
     user = relationship("User", back_populates="subscriptions")
-    plan = relationship("SubscriptionPlan", back_populates="subscriptions")
+    # plan_id is NOT NULL, so the plan always comes back in the same query
+    plan = relationship("SubscriptionPlan", back_populates="subscriptions", lazy="joined", innerjoin=True)
 
 class PaymentMethod(Base):
     __tablename__ = "payment_methods"
@@ -121,14 +154,14 @@ class PaymentMethod(Base):
 class Transaction(Base):
     __tablename__ = "transactions"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, Identity(cache=1000), primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     amount = Column(Float)
     currency = Column(String, default="USD")
     stripe_payment_intent_id = Column(String, unique=True)
-    status = Column(Enum(PaymentStatus))
+    status = Column(_pg_enum(PaymentStatus, 'payment_status'))
     description = Column(Text, nullable=True)
-    metadata = Column(JSON, nullable=True)
+    metadata = Column(JSONB, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     purchase_type = Column(String, nullable=True)  # 'subscription', 'query_pack', etc.
@@ -143,11 +176,11 @@ class QueryPurchase(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    purchase_type = Column(Enum(QueryPurchaseType))
+    purchase_type = Column(_pg_enum(QueryPurchaseType, 'query_purchase_type'))
     quantity = Column(Integer)  # Number of queries purchased
     price_per_query = Column(Float)  # Price per query in USD
     total_amount = Column(Float)  # Total amount paid
-    transaction_id = Column(Integer, ForeignKey("transactions.id"))
+    transaction_id = Column(BigInteger, ForeignKey("transactions.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     expires_at = Column(DateTime(timezone=True), nullable=True)  # Optional expiration
 
@@ -155,28 +188,16 @@ class QueryPurchase(Base):
     user = relationship("User", backref="query_purchases")
     transaction = relationship("Transaction", back_populates="query_purchase")
 
-class QueryCredit(Base):
-    __tablename__ = "query_credits"
-
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    remaining_queries = Column(Integer, default=0)
-    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
-    
-    # Relationships
-    user = relationship("User", backref="query_credits")
-    usage_history = relationship("QueryUsage", back_populates="credit")
-
 class QueryUsage(Base):
     __tablename__ = "query_usage"
 
     id = Column(Integer, primary_key=True, index=True)
-    credit_id = Column(Integer, ForeignKey("query_credits.id"))
+    user_id = Column(Integer, ForeignKey("users.id"))
     task_id = Column(Integer, ForeignKey("research_tasks.id"))
     used_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    credit = relationship("QueryCredit", back_populates="usage_history")
+    user = relationship("User", backref="query_usage")
     task = relationship("ResearchTask", backref="query_usage")
 
 class ResearchTask(Base):
@@ -184,7 +205,7 @@ class ResearchTask(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     query = Column(Text)
-    status = Column(Enum(ResearchStatus), default=ResearchStatus.PENDING)
+    status = Column(_pg_enum(ResearchStatus, 'research_status'), default=ResearchStatus.PENDING)
     result = Column(Text, nullable=True)
     error_message = Column(Text, nullable=True)
     continuous_mode = Column(Boolean, default=False)
@@ -196,21 +217,22 @@ class ResearchTask(Base):
     owner_id = Column(Integer, ForeignKey("users.id"))
     
     # New fields for multi-model support
-    web_results = Column(JSON, nullable=True)  # Store web results with snippets
-    ai_analyses = Column(JSON, nullable=True)  # Store analyses from different models
+    web_results = Column(JSONB, nullable=True)  # Store web results with snippets
+    ai_analyses = Column(JSONB, nullable=True)  # Store analyses from different models
     models_used = Column(ARRAY(String), nullable=True)  # Track which models were used
     used_ollama = Column(Boolean, default=False)  # Track Ollama usage
     
     # Relationships
-    owner = relationship("User", back_populates="research_tasks")
-    analytics = relationship("ResearchAnalytics", back_populates="task", uselist=False)
-    sources = relationship("ResearchSource", back_populates="task")
+    # owner_id is NOT NULL; child rows for a page of tasks load in one IN query
+    owner = relationship("User", back_populates="research_tasks", lazy="joined", innerjoin=True)
+    analytics = relationship("ResearchAnalytics", back_populates="task", uselist=False, lazy="selectin")
+    sources = relationship("ResearchSource", back_populates="task", lazy="selectin")
     model_results = relationship("ModelResult", back_populates="task")
 
 class ResearchAnalytics(Base):
     __tablename__ = "research_analytics"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, Identity(cache=1000), primary_key=True, index=True)
     task_id = Column(Integer, ForeignKey("research_tasks.id"), unique=True)
     processing_time = Column(Integer)  # in milliseconds
     token_count = Column(Integer)
@@ -230,7 +252,7 @@ class ResearchAnalytics(Base):
 class ResearchSource(Base):
     __tablename__ = "research_sources"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, Identity(cache=1000), primary_key=True, index=True)
     task_id = Column(Integer, ForeignKey("research_tasks.id"))
     url = Column(String)
     title = Column(String, nullable=True)
@@ -247,10 +269,10 @@ class ResearchSource(Base):
 class ModelResult(Base):
     __tablename__ = "model_results"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, Identity(cache=1000), primary_key=True, index=True)
     task_id = Column(Integer, ForeignKey("research_tasks.id"))
-    source_id = Column(Integer, ForeignKey("research_sources.id"))
-    model_type = Column(Enum(AIModelType))
+    source_id = Column(BigInteger, ForeignKey("research_sources.id"))
+    model_type = Column(_pg_enum(AIModelType, 'ai_model_type'))
     analysis = Column(Text)
     confidence = Column(Float)
     processing_time = Column(Integer)  # in milliseconds
@@ -289,30 +311,64 @@ class RefreshToken(Base):
     user = relationship("User")
 
 class AuditLog(Base):
+    """Range-partitioned by month on timestamp; see maintain_audit_log_partitions"""
     __tablename__ = "audit_logs"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
-    id = Column(Integer, primary_key=True, index=True)
+    # The partition key must be part of the primary key
+    id = Column(BigInteger, Identity(cache=1000), primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     action = Column(String)
     resource_type = Column(String)
     resource_id = Column(Integer)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     ip_address = Column(String)
     user_agent = Column(String)
     details = Column(Text, nullable=True)
 
+    # Column order of the tuples passed to bulk_insert; timestamp and id
+    # come from the column defaults
+    COPY_COLUMNS = ('user_id', 'action', 'resource_type', 'resource_id', 'ip_address', 'user_agent', 'details')
+
+    @classmethod
+    async def bulk_insert(cls, session, rows):
+        """COPY rows (tuples in COPY_COLUMNS order) in one round trip"""
+        await _copy_records(session, cls, rows)
+
+class ProcessedEvent(Base):
+    """Stripe webhook events already handled, keyed by Stripe event ID"""
+    __tablename__ = "processed_events"
+
+    id = Column(String, primary_key=True)
+    type = Column(String)
+    processed_at = Column(DateTime(timezone=True), server_default=func.now())
+
 # Create indexes
 from sqlalchemy import Index
 
-Index('ix_research_tasks_status', ResearchTask.status)
-Index('ix_research_tasks_owner_created', ResearchTask.owner_id, ResearchTask.created_at.desc())
+Index('ix_research_tasks_owner_status_created', ResearchTask.owner_id, ResearchTask.status,
+      ResearchTask.created_at.desc(), postgresql_include=['id', 'completed_at'])
+Index('ix_research_tasks_owner_created', ResearchTask.owner_id, ResearchTask.created_at.desc(),
+      ResearchTask.id.desc())
+Index('ix_research_tasks_created', ResearchTask.created_at.desc(), ResearchTask.id.desc())
+Index('ix_research_tasks_ai_analyses_gin', ResearchTask.ai_analyses, postgresql_using='gin')
 Index('ix_api_keys_active', APIKey.is_active)
+Index('ix_refresh_tokens_user_active', RefreshToken.user_id, RefreshToken.expires_at,
+      postgresql_where=RefreshToken.replaced_by.is_(None))
 Index('ix_audit_logs_user_timestamp', AuditLog.user_id, AuditLog.timestamp.desc())
-Index('ix_subscriptions_user_status', Subscription.user_id, Subscription.status)
+Index('ix_subscriptions_user_status', Subscription.user_id, Subscription.status,
+      postgresql_include=['cancel_at_period_end', 'current_period_end', 'plan_id'])
 Index('ix_transactions_user_created', Transaction.user_id, Transaction.created_at.desc())
 Index('ix_payment_methods_user_default', PaymentMethod.user_id, PaymentMethod.is_default)
 Index('ix_model_results_task_model', ModelResult.task_id, ModelResult.model_type)
 Index('ix_research_sources_task_relevance', ResearchSource.task_id, ResearchSource.relevance_score.desc())
 Index('ix_query_purchases_user_created', QueryPurchase.user_id, QueryPurchase.created_at.desc())
-Index('ix_query_credits_user', QueryCredit.user_id)
-Index('ix_query_usage_credit', QueryUsage.credit_id, QueryUsage.used_at.desc())
\ No newline at end of file
+Index('ix_query_usage_user', QueryUsage.user_id, QueryUsage.used_at.desc())
+Index('brin_audit_logs_timestamp', AuditLog.timestamp,
+      postgresql_using='brin', postgresql_with={'pages_per_range': 32})
+Index('brin_transactions_created_at', Transaction.created_at,
+      postgresql_using='brin', postgresql_with={'pages_per_range': 32})
+Index('brin_query_purchases_created_at', QueryPurchase.created_at,
+      postgresql_using='brin', postgresql_with={'pages_per_range': 32})
+Index('brin_research_sources_processed_at', ResearchSource.processed_at,
+      postgresql_using='brin', postgresql_with={'pages_per_range': 32})
\ No newline at end of file
@@ -1,22 +1,38 @@
+import atexit
+import inspect
 import logging
+import queue
 import time
 from functools import wraps
 from typing import Callable, Dict, Any
 import json
+import orjson
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 import traceback
 from prometheus_client import Counter, Histogram, start_http_server
 import os
 
 # Configure logging
+# Records are only enqueued on the calling thread; formatting and file/stream
+# I/O happen on a listener thread so logging never blocks the event loop
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler('logs/api.log'),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.Queue(-1)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/api.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[QueueHandler(_log_queue)]
 )
+_log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logger = logging.getLogger(__name__)
 
 # Prometheus metrics
@@ -57,25 +73,48 @@ class APILogger:
 # Monitoring decorator for API endpoints
 def monitor_endpoint(endpoint_name: str):
     def decorator(func: Callable):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            start_time = time.time()
-            status_code = 500
-            try:
-                response = await func(*args, **kwargs)
-                status_code = response.status_code if hasattr(response, 'status_code') else 200
-                return response
-            except Exception as e:
-                api_logger.log_error("endpoint_error", e)
-                raise
-            finally:
-                duration = time.time() - start_time
-                api_logger.log_request(
-                    method=kwargs.get('method', 'UNKNOWN'),
-                    endpoint=endpoint_name,
-                    status_code=status_code,
-                    duration=duration
+        # Handlers are called with their parameters only, so the HTTP method
+        # is never known here; bind the label children once per endpoint
+        latency = REQUEST_LATENCY.labels(method="UNKNOWN", endpoint=endpoint_name)
+        counters = {}
+
+        def record(status_code: int, start: int):
+            latency.observe((time.perf_counter_ns() - start) / 1e9)
+            counter = counters.get(status_code)
+            if counter is None:
+                counter = counters[status_code] = REQUEST_COUNT.labels(
+                    method="UNKNOWN", endpoint=endpoint_name, status=status_code
                 )
+            counter.inc()
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                status_code = 500
+                try:
+                    response = await func(*args, **kwargs)
+                    status_code = getattr(response, "status_code", 200)
+                    return response
+                except Exception as e:
+                    api_logger.log_error("endpoint_error", e)
+                    raise
+                finally:
+                    record(status_code, start)
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                status_code = 500
+                try:
+                    response = func(*args, **kwargs)
+                    status_code = getattr(response, "status_code", 200)
+                    return response
+                except Exception as e:
+                    api_logger.log_error("endpoint_error", e)
+                    raise
+                finally:
+                    record(status_code, start)
         return wrapper
     return decorator
 
@@ -97,6 +136,8 @@ class RequestLogMiddleware:
                 duration=duration
             )
 
+_LOG_LEVELS = {"error": logging.ERROR, "warning": logging.WARNING}
+
 class StructuredLogger:
     """Structured logging with JSON format"""
     def __init__(self, service_name: str):
@@ -104,6 +145,9 @@ class StructuredLogger:
 
     def log(self, level: str, message: str, **kwargs):
         """Log a message with structured data"""
+        log_level = _LOG_LEVELS.get(level, logging.INFO)
+        if not logger.isEnabledFor(log_level):
+            return
         log_data = {
             "timestamp": datetime.utcnow().isoformat(),
             "service": self.service_name,
@@ -111,14 +155,13 @@ class StructuredLogger:
             "message": message,
             **kwargs
         }
-        log_message = json.dumps(log_data)
+        # NON_STR_KEYS keeps int-keyed payloads serializable; default=str
+        # covers any other value orjson cannot encode natively
+        log_message = orjson.dumps(
+            log_data, option=orjson.OPT_NON_STR_KEYS, default=str
+        ).decode()
         
-        if level == "error":
-            logger.error(log_message)
-        elif level == "warning":
-            logger.warning(log_message)
-        else:
-            logger.info(log_message)
+        logger.log(log_level, log_message)
 
 def setup_monitoring(app):
     """Setup monitoring for the FastAPI application"""
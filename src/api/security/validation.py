@@ -8,6 +8,7 @@ error responses to prevent security vulnerabilities.
 from pydantic import BaseModel, validator, Field
 import re
 import bleach
+import orjson
 from typing import Optional, List, Dict, Any
 import logging
 
@@ -170,6 +171,19 @@ class ErrorResponse:
             "request_id": request_id
         }
     
+    @classmethod
+    def get_bytes(cls, error_type: str, request_id: Optional[str] = None) -> bytes:
+        """
+        Get standardized error response as serialized JSON
+        
+        Same payload as ``get``; known error types are serialized once at
+        import and only the request ID is spliced in.
+        """
+        template = _PRECOMPILED_ERRORS.get(error_type)
+        if template is None:
+            return orjson.dumps(cls.get(error_type, request_id))
+        return template.replace(_REQUEST_ID_PLACEHOLDER, orjson.dumps(request_id))
+    
     @classmethod
     def get_http_status(cls, error_type: str) -> int:
         """Get appropriate HTTP status code for error type"""
@@ -193,6 +207,17 @@ class ErrorResponse:
         return status_map.get(error_type, 500)
 
 
+_REQUEST_ID_PLACEHOLDER = b'"__RID__"'
+_PRECOMPILED_ERRORS: Dict[str, bytes] = {
+    error_type: orjson.dumps({
+        "error": message,
+        "code": error_type,
+        "request_id": "__RID__"
+    })
+    for error_type, message in ErrorResponse.ERRORS.items()
+}
+
+
 class SanitizationUtils:
     """Utility functions for data sanitization"""
     
@@ -8,10 +8,13 @@ distributed state management, and enhanced security.
 import asyncio
 import json
 import logging
+import time
 import uuid
+import zlib
 from typing import Dict, List, Optional, Any, Set
 from datetime import datetime
 
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect, Depends, status, HTTPException
 from fastapi.responses import JSONResponse
 from starlette.websockets import WebSocketState
@@ -44,6 +47,22 @@ from .monitoring import structured_logger
 
 logger = logging.getLogger(__name__)
 
+# Every outbound message goes through the session's queue and is framed by
+# the subprotocol negotiated at connect. Without one, each message is a single
+# JSON text frame.
+# Clients offering this subprotocol receive each message as a zlib-compressed
+# binary frame; broadcasts are compressed once, not per peer
+COMPRESSED_SUBPROTOCOL = "parallax.zlib"
+BROADCAST_COMPRESSION_LEVEL = 6
+# Clients offering this subprotocol receive JSON-array text frames: the writer
+# waits COALESCE_WINDOW after the first message, then sends up to the byte cap
+BATCHED_SUBPROTOCOL = "parallax.batch"
+COALESCE_WINDOW = 0.002
+COALESCE_MAX_BYTES = 16 * 1024
+
+# Outbound frames queued per session before a slow consumer starts losing them
+OUTBOUND_QUEUE_SIZE = 1000
+
 
 class EnhancedADKWebSocketManager:
     """
@@ -80,6 +99,11 @@ class EnhancedADKWebSocketManager:
         # Lock for thread safety
         self.lock = asyncio.Lock()
         
+        # Last agent health result as (monotonic time, health); the lock
+        # lets one caller refresh it while concurrent callers wait
+        self._health_cache: Optional[tuple[float, dict]] = None
+        self._health_lock = asyncio.Lock()
+        
         logger.info("Enhanced ADK WebSocket manager initialized")
     
     async def initialize(self):
@@ -145,8 +169,16 @@ class EnhancedADKWebSocketManager:
             )
             return None
         
-        # Accept connection
-        await websocket.accept()
+        # Accept connection, picking the framing the client offered
+        offered = getattr(websocket, "scope", {}).get("subprotocols", ())
+        framing = next(
+            (p for p in (COMPRESSED_SUBPROTOCOL, BATCHED_SUBPROTOCOL) if p in offered),
+            None
+        )
+        if framing:
+            await websocket.accept(subprotocol=framing)
+        else:
+            await websocket.accept()
         
         async with self.lock:
             # Generate session ID
@@ -158,10 +190,22 @@ class EnhancedADKWebSocketManager:
             
             self.local_connections[user_id][session_id] = websocket
             
+            # One queue and writer per session, so broadcasts never await
+            # a peer's socket or allocate a task per send
+            out_queue: asyncio.Queue = asyncio.Queue(maxsize=OUTBOUND_QUEUE_SIZE)
+            writer = asyncio.create_task(
+                self._write_outbound(websocket, out_queue, framing)
+            )
+            self.background_tasks.add(writer)
+            writer.add_done_callback(self.background_tasks.discard)
+
             # Store metadata
             self.connection_metadata[session_id] = {
                 'user_id': user_id,
                 'user_tier': user_tier,
+                'compressed': framing == COMPRESSED_SUBPROTOCOL,
+                'out_queue': out_queue,
+                'writer': writer,
                 'connected_at': datetime.now().isoformat(),
                 'last_activity': datetime.now().isoformat()
             }
@@ -179,7 +223,7 @@ class EnhancedADKWebSocketManager:
             )
             
             # Send connection confirmation
-            await websocket.send_json({
+            self._send(session_id, {
                 "type": "connection_established",
                 "session_id": session_id,
                 "timestamp": datetime.now().isoformat(),
@@ -208,6 +252,7 @@ class EnhancedADKWebSocketManager:
             
             # Remove metadata
             del self.connection_metadata[session_id]
+            metadata['writer'].cancel()
             
             # Update distributed state
             await self.state_manager.remove_user_session(user_id, session_id)
@@ -223,6 +268,114 @@ class EnhancedADKWebSocketManager:
                 session_id=session_id
             )
     
+    async def get_agent_health(self, max_age: float) -> dict:
+        """ADK agent health, reused for up to ``max_age`` seconds"""
+        
+        cached = self._health_cache
+        if cached and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        
+        async with self._health_lock:
+            # Another caller may have refreshed it while we waited
+            cached = self._health_cache
+            if cached and time.monotonic() - cached[0] < max_age:
+                return cached[1]
+            
+            health = await self.adk.get_agent_health()
+            self._health_cache = (time.monotonic(), health)
+            return health
+    
+    async def broadcast(self, message: dict, user_id: Optional[str] = None):
+        """
+        Send a message to every local session, or only to a user's sessions
+
+        The message is serialized once and, if any receiver opted in to
+        compression, compressed once; the same frame is queued for every
+        peer and written by that session's writer task.
+        """
+        if user_id is not None:
+            session_ids = list(self.local_connections.get(user_id, {}))
+        else:
+            session_ids = [
+                session_id
+                for connections in list(self.local_connections.values())
+                for session_id in connections
+            ]
+        if not session_ids:
+            return
+
+        payload = orjson.dumps(message, default=str)
+        compressed = None
+
+        for session_id in session_ids:
+            metadata = self.connection_metadata.get(session_id)
+            if not metadata:
+                continue
+            if metadata['compressed']:
+                if compressed is None:
+                    compressed = zlib.compress(payload, BROADCAST_COMPRESSION_LEVEL)
+                self._enqueue(session_id, metadata, compressed)
+            else:
+                self._enqueue(session_id, metadata, payload)
+
+    def _send(self, session_id: str, message: dict):
+        """Queue a message for one session; dropped if it has disconnected"""
+
+        metadata = self.connection_metadata.get(session_id)
+        if not metadata:
+            return
+
+        payload = orjson.dumps(message, default=str)
+        if metadata['compressed']:
+            payload = zlib.compress(payload, BROADCAST_COMPRESSION_LEVEL)
+        self._enqueue(session_id, metadata, payload)
+
+    def _enqueue(self, session_id: str, metadata: dict, frame: bytes):
+        try:
+            metadata['out_queue'].put_nowait(frame)
+        except asyncio.QueueFull:
+            # Slow consumer: drop the frame rather than stall the sender
+            logger.warning(f"Outbound queue full, dropping message for {session_id}")
+
+    async def _write_outbound(
+        self,
+        websocket: WebSocket,
+        out_queue: asyncio.Queue,
+        framing: Optional[str]
+    ):
+        """Drain a session's outbound queue onto its socket"""
+
+        try:
+            while websocket.client_state == WebSocketState.CONNECTED:
+                frame = await out_queue.get()
+                if framing == COMPRESSED_SUBPROTOCOL:
+                    await websocket.send_bytes(frame)
+                    out_queue.task_done()
+                    continue
+                if framing != BATCHED_SUBPROTOCOL:
+                    await websocket.send_text(frame.decode())
+                    out_queue.task_done()
+                    continue
+
+                # Give follow-up updates a moment to arrive, then send
+                # everything pending as one frame
+                await asyncio.sleep(COALESCE_WINDOW)
+                batch = [frame]
+                size = len(frame)
+                while size < COALESCE_MAX_BYTES and not out_queue.empty():
+                    frame = out_queue.get_nowait()
+                    batch.append(frame)
+                    size += len(frame)
+                await websocket.send_text(
+                    (b"[" + b",".join(batch) + b"]").decode()
+                )
+                for _ in batch:
+                    out_queue.task_done()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Outbound writer stopped: {e}")
+
     async def handle_message(
         self,
         websocket: WebSocket,
@@ -344,7 +497,7 @@ class EnhancedADKWebSocketManager:
         task.add_done_callback(self.background_tasks.discard)
         
         # Send acknowledgment
-        await websocket.send_json({
+        self._send(session_id, {
             "type": "research_started",
             "task_id": task_id,
             "session_id": session_id,
@@ -383,7 +536,7 @@ class EnhancedADKWebSocketManager:
                 )
                 
                 # Send to WebSocket
-                await websocket.send_json({
+                self._send(session_id, {
                     "type": "research_update",
                     "task_id": task_id,
                     "session_id": session_id,
@@ -427,7 +580,7 @@ class EnhancedADKWebSocketManager:
         await self.state_manager.increment_metric('research_completed')
         
         # Send completion message
-        await websocket.send_json({
+        self._send(session_id, {
             "type": "research_completed",
             "task_id": task_id,
             "session_id": session_id,
@@ -475,7 +628,7 @@ class EnhancedADKWebSocketManager:
         )
         
         # Send confirmation
-        await websocket.send_json({
+        self._send(session_id, {
             "type": "research_cancelled",
             "task_id": task_id,
             "session_id": session_id
@@ -489,7 +642,7 @@ class EnhancedADKWebSocketManager:
     ):
         """Handle ping message"""
         
-        await websocket.send_json({
+        self._send(session_id, {
             "type": "pong",
             "session_id": session_id,
             "timestamp": datetime.now().isoformat()
@@ -509,7 +662,7 @@ class EnhancedADKWebSocketManager:
         if additional_info:
             error_response.update(additional_info)
         
-        await websocket.send_json({
+        self._send(session_id, {
             "type": "error",
             "session_id": session_id,
             **error_response
@@ -578,8 +731,8 @@ class EnhancedADKWebSocketManager:
         """Process event from another instance"""
         
         # Handle different event types
-        # (Implementation depends on event types)
-        pass
+        if event.get('type') == 'agent_health':
+            await self.broadcast(event)
     
     async def _monitor_agent_health(self):
         """Monitor ADK agent health"""
@@ -4,6 +4,7 @@ Pytest configuration and fixtures
 
 import pytest
 import asyncio
+from contextlib import contextmanager
 from typing import AsyncGenerator, Generator
 from unittest.mock import AsyncMock, Mock, patch
 import os
@@ -15,7 +16,7 @@ os.environ['GOOGLE_CLOUD_LOCATION'] = 'us-central1'
 
 # Import after setting environment variables
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 
@@ -29,6 +30,28 @@ from src.api.models import User
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
+@contextmanager
+def count_queries(engine):
+    """
+    Collect the SQL statements an engine executes inside the block
+    
+    Use to pin the query count of relationship loads, e.g.
+    ``with count_queries(engine) as statements: ...``, then assert on
+    ``len(statements)``. Accepts sync or async engines.
+    """
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    target = getattr(engine, "sync_engine", engine)
+    event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
 @pytest.fixture(scope="session")
 def event_loop() -> Generator:
     """Create an instance of the default event loop for the test session."""
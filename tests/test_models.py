@@ -0,0 +1,126 @@
+"""
+Model loading test suite
+
+Pins the number of statements relationship loads issue, so an N+1 on task
+owners, sources or analytics shows up as a failing count. These tests need
+the Postgres column types (JSONB, ARRAY, CITEXT, native enums) and run
+against the database in TEST_POSTGRES_URL, e.g.
+``postgresql+asyncpg://postgres@localhost/parallax_test``.
+"""
+
+import os
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import ENUM as PGEnum
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.api.database import Base
+from src.api.models import (
+    ResearchAnalytics,
+    ResearchSource,
+    ResearchStatus,
+    ResearchTask,
+    User
+)
+from tests.conftest import count_queries
+
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_POSTGRES_URL,
+    reason="TEST_POSTGRES_URL is not set"
+)
+
+TABLES = [
+    User.__table__,
+    ResearchTask.__table__,
+    ResearchAnalytics.__table__,
+    ResearchSource.__table__
+]
+
+
+@pytest.fixture
+async def pg_engine():
+    """Postgres engine with just the tables the task relationships touch"""
+    engine = create_async_engine(TEST_POSTGRES_URL, echo=False)
+
+    def create_schema(conn):
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS citext"))
+        # Models never emit CREATE TYPE; the migrations own the enums
+        for table in TABLES:
+            for column in table.columns:
+                if isinstance(column.type, PGEnum):
+                    column.type.create(conn, checkfirst=True)
+        Base.metadata.create_all(conn, tables=TABLES)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(create_schema)
+
+    yield engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: Base.metadata.drop_all(sync_conn, tables=TABLES))
+    await engine.dispose()
+
+
+async def _seed_tasks(session_factory, count: int):
+    """Create one user owning ``count`` tasks, each with analytics and sources"""
+    async with session_factory() as session:
+        user = User(
+            email=f"owner{count}@example.com",
+            username=f"owner{count}",
+            hashed_password="x"
+        )
+        session.add(user)
+        for i in range(count):
+            task = ResearchTask(
+                query=f"query {i}",
+                status=ResearchStatus.COMPLETED,
+                owner=user
+            )
+            task.analytics = ResearchAnalytics(processing_time=10, source_count=2)
+            task.sources = [
+                ResearchSource(url=f"https://example.com/{i}/{n}", source_type="web")
+                for n in range(2)
+            ]
+            session.add(task)
+        await session.commit()
+
+
+async def _load_tasks(engine, session_factory):
+    """Load every task and touch each relationship; returns the statements run"""
+    async with session_factory() as session:
+        with count_queries(engine) as statements:
+            tasks = (await session.scalars(select(ResearchTask))).unique().all()
+            for task in tasks:
+                assert task.owner.email
+                assert task.analytics is not None
+                assert len(task.sources) == 2
+    return tasks, statements
+
+
+class TestResearchTaskLoading:
+    """Test task relationships load without per-row queries"""
+
+    @pytest.mark.asyncio
+    async def test_statement_count_independent_of_row_count(self, pg_engine):
+        """Loading 3 or 30 tasks with children runs the same statements"""
+
+        session_factory = sessionmaker(
+            pg_engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+        await _seed_tasks(session_factory, 3)
+        tasks, few = await _load_tasks(pg_engine, session_factory)
+        assert len(tasks) == 3
+
+        await _seed_tasks(session_factory, 27)
+        tasks, many = await _load_tasks(pg_engine, session_factory)
+        assert len(tasks) == 30
+
+        # Tasks with their owner, then one IN query per selectin relationship
+        assert len(few) == 3
+        assert len(many) == len(few)
@@ -0,0 +1,270 @@
+"""
+Rate limiter test suite
+
+Exercises RateLimiter.check_rate_limit against in-memory stand-ins for the
+token-bucket script and a Redis pipeline, with the clock under test control.
+"""
+
+import pytest
+import redis.asyncio as redis
+
+from src.api.middleware import rate_limiter as rate_limiter_module
+from src.api.middleware.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """Replacement for time.time that only moves when told to"""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class FakeTokenBucketScript:
+    """Python port of TOKEN_BUCKET_LUA, called like a registered AsyncScript"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.calls = 0
+
+    async def __call__(self, keys, args):
+        self.calls += 1
+        now, capacity, rate, _ttl = args
+        tokens, last = self.buckets.get(keys[0], (capacity, now))
+        tokens = min(capacity, tokens + max(0, now - last) * rate)
+
+        allowed = 0
+        if tokens >= 1:
+            tokens -= 1
+            allowed = 1
+        self.buckets[keys[0]] = (tokens, now)
+        return [allowed, str(tokens)]
+
+
+class NoScriptingScript:
+    """Script stand-in for a server with EVAL/EVALSHA disabled"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, keys, args):
+        self.calls += 1
+        raise redis.ResponseError("unknown command 'EVALSHA'")
+
+
+class FakePipeline:
+    """The ZSET and counter commands the pipelined sliding window uses"""
+
+    def __init__(self, store: dict):
+        self.store = store
+        self.commands = []
+
+    def zremrangebyscore(self, key, low, high):
+        self.commands.append(lambda: self._zremrangebyscore(key, low, high))
+
+    def zcard(self, key):
+        self.commands.append(lambda: len(self.store.get(key, {})))
+
+    def zrange(self, key, start, stop, withscores=False):
+        def run():
+            members = sorted(self.store.get(key, {}).items(), key=lambda item: item[1])
+            return members[start:stop + 1]
+        self.commands.append(run)
+
+    def zadd(self, key, mapping):
+        self.commands.append(lambda: self.store.setdefault(key, {}).update(mapping))
+
+    def get(self, key):
+        self.commands.append(lambda: self.store.get(key))
+
+    def incr(self, key):
+        def run():
+            self.store[key] = int(self.store.get(key) or 0) + 1
+            return self.store[key]
+        self.commands.append(run)
+
+    def expire(self, key, seconds):
+        self.commands.append(lambda: True)
+
+    def _zremrangebyscore(self, key, low, high):
+        zset = self.store.get(key, {})
+        for member, score in list(zset.items()):
+            if low <= score <= high:
+                del zset[member]
+
+    async def execute(self):
+        results = [command() for command in self.commands]
+        self.commands = []
+        return results
+
+
+class FakeRedis:
+    """Connection stand-in; only pipelines are used by the fallback path"""
+
+    def __init__(self):
+        self.store = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.store)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock(1000.5)
+    monkeypatch.setattr(rate_limiter_module.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def limiter():
+    """Token-bucket limiter wired to the in-memory script"""
+    limiter = RateLimiter()
+    # get_redis() only connects and registers scripts when _redis is unset
+    limiter._redis = FakeRedis()
+    limiter._token_bucket = FakeTokenBucketScript()
+    limiter._sliding_window = NoScriptingScript()
+    return limiter
+
+
+class TestTokenBucket:
+    """Test the default token-bucket algorithm"""
+
+    @pytest.mark.asyncio
+    async def test_allows_until_capacity_then_denies(self, limiter, clock):
+        """Test requests pass until the bucket is empty"""
+
+        for expected_remaining in (2, 1, 0):
+            allowed, metadata = await limiter.check_rate_limit("client", 3, 60)
+            assert allowed
+            assert metadata["remaining"] == expected_remaining
+
+        allowed, metadata = await limiter.check_rate_limit("client", 3, 60)
+        assert not allowed
+        assert metadata["remaining"] == 0
+        # One token every 20 seconds
+        assert metadata["reset"] == 1021
+
+    @pytest.mark.asyncio
+    async def test_refills_after_time_passes(self, limiter, clock):
+        """Test an emptied bucket admits requests again as tokens refill"""
+
+        for _ in range(3):
+            await limiter.check_rate_limit("client", 3, 60)
+        allowed, _ = await limiter.check_rate_limit("client", 3, 60)
+        assert not allowed
+
+        # Just short of one token
+        clock.advance(19)
+        allowed, _ = await limiter.check_rate_limit("client", 3, 60)
+        assert not allowed
+
+        clock.advance(1.5)
+        allowed, _ = await limiter.check_rate_limit("client", 3, 60)
+        assert allowed
+        allowed, _ = await limiter.check_rate_limit("client", 3, 60)
+        assert not allowed
+
+    @pytest.mark.asyncio
+    async def test_keys_are_independent(self, limiter, clock):
+        """Test one client's empty bucket does not affect another's"""
+
+        for _ in range(4):
+            await limiter.check_rate_limit("client-a", 3, 60)
+
+        allowed, _ = await limiter.check_rate_limit("client-b", 3, 60)
+        assert allowed
+
+
+class TestLocalDenialCache:
+    """Test denials are answered in-process until the reset time"""
+
+    @pytest.mark.asyncio
+    async def test_denial_short_circuits_until_reset(self, limiter, clock):
+        """Test repeat checks skip Redis while the cached denial is live"""
+
+        # 10 tokens per second: the next token is due within the same second
+        for _ in range(10):
+            await limiter.check_rate_limit("client", 10, 1)
+        allowed, metadata = await limiter.check_rate_limit("client", 10, 1)
+        assert not allowed
+        assert metadata["reset"] == 1001
+        calls = limiter._token_bucket.calls
+
+        clock.advance(0.25)
+        allowed, cached = await limiter.check_rate_limit("client", 10, 1)
+        assert not allowed
+        assert cached == metadata
+        assert limiter._token_bucket.calls == calls
+
+        # The reset time comes before LOCAL_DENY_TTL and ends the cached denial
+        clock.advance(0.25)
+        allowed, _ = await limiter.check_rate_limit("client", 10, 1)
+        assert allowed
+        assert limiter._token_bucket.calls == calls + 1
+
+    @pytest.mark.asyncio
+    async def test_denial_cached_at_most_local_ttl(self, limiter, clock):
+        """Test a far-off reset is only trusted locally for LOCAL_DENY_TTL"""
+
+        for _ in range(4):
+            await limiter.check_rate_limit("client", 3, 60)
+        calls = limiter._token_bucket.calls
+
+        clock.advance(rate_limiter_module.LOCAL_DENY_TTL)
+        allowed, _ = await limiter.check_rate_limit("client", 3, 60)
+        assert not allowed
+        assert limiter._token_bucket.calls == calls + 1
+
+    @pytest.mark.asyncio
+    async def test_allowed_results_are_not_cached(self, limiter, clock):
+        """Test only denials are remembered locally"""
+
+        await limiter.check_rate_limit("client", 3, 60)
+        await limiter.check_rate_limit("client", 3, 60)
+
+        assert "client" not in limiter._local_denials
+        assert limiter._token_bucket.calls == 2
+
+
+class TestScriptingFallback:
+    """Test the pipelined sliding window used when Lua is unavailable"""
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_script_rejected(self, limiter, clock):
+        """Test a rejected script switches to pipelined checks for good"""
+
+        limiter._token_bucket = NoScriptingScript()
+
+        for expected_remaining in (2, 1, 0):
+            allowed, metadata = await limiter.check_rate_limit("client", 3, 60)
+            assert allowed
+            assert metadata["remaining"] == expected_remaining
+            clock.advance(0.01)
+
+        allowed, metadata = await limiter.check_rate_limit("client", 3, 60)
+        assert not allowed
+        assert metadata["remaining"] == 0
+
+        # Scripting is only tried once; later checks go straight to the pipeline
+        assert not limiter._lua_available
+        assert limiter._token_bucket.calls == 1
+        assert limiter._sliding_window.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_other_script_errors_fail_open(self, limiter, clock):
+        """Test unrelated Redis errors allow the request and keep Lua enabled"""
+
+        async def failing_script(keys, args):
+            raise redis.ResponseError("BUSY Redis is busy running a script")
+
+        limiter._token_bucket = failing_script
+
+        allowed, metadata = await limiter.check_rate_limit("client", 3, 60)
+        assert allowed
+        assert metadata["redis_error"]
+        assert limiter._lua_available
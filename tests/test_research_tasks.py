@@ -0,0 +1,158 @@
+"""
+Research task listing test suite
+
+Tests keyset pagination of task lists: cursor round trips, the
+(created_at, id) tie-break and rejection of malformed cursors.
+"""
+
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.api import main
+from src.api.main import (
+    NEXT_CURSOR_HEADER,
+    TASK_LIST_COLUMNS,
+    _decode_task_cursor,
+    _encode_task_cursor,
+    _list_task_page
+)
+
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+# Only the columns the list query selects; the full model needs Postgres types
+RESEARCH_TASKS_DDL = """
+CREATE TABLE research_tasks (
+    id INTEGER PRIMARY KEY,
+    query TEXT,
+    status VARCHAR(20),
+    created_at DATETIME,
+    updated_at DATETIME,
+    completed_at DATETIME,
+    owner_id INTEGER
+)
+"""
+
+SHARED_CREATED_AT = datetime(2026, 10, 17, 12, 0, 0)
+
+
+def _cursor(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+@pytest.fixture
+async def task_sessions(monkeypatch):
+    """Task table in SQLite, used by the list helpers instead of Postgres"""
+    engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+    async with engine.begin() as conn:
+        await conn.execute(text(RESEARCH_TASKS_DDL))
+
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(main, "AsyncSessionLocal", session_factory)
+    yield session_factory
+
+    await engine.dispose()
+
+
+async def _insert_tasks(session_factory, created_ats):
+    async with session_factory() as session:
+        for task_id, created_at in enumerate(created_ats, start=1):
+            await session.execute(
+                text(
+                    "INSERT INTO research_tasks (id, query, status, created_at, owner_id) "
+                    "VALUES (:id, :query, 'completed', :created_at, 1)"
+                ),
+                {
+                    "id": task_id,
+                    "query": f"query {task_id}",
+                    "created_at": created_at.strftime("%Y-%m-%d %H:%M:%S.%f")
+                }
+            )
+        await session.commit()
+
+
+class TestTaskCursor:
+    """Test cursor encoding and decoding"""
+
+    def test_round_trip(self):
+        """Test a cursor decodes to the row's (created_at, id)"""
+
+        row = {"created_at": SHARED_CREATED_AT, "id": 42}
+        assert _decode_task_cursor(_encode_task_cursor(row)) == (SHARED_CREATED_AT, 42)
+
+    @pytest.mark.parametrize("cursor", [
+        "not a cursor!",
+        "YWJj",  # "abc": no separator
+        _cursor(b"2026-13-45T00:00:00|1"),
+        _cursor(b"2026-10-17T12:00:00|abc"),
+        _cursor(b"\xff\xfe|1"),
+        "",
+    ])
+    def test_malformed_cursor_is_bad_request(self, cursor):
+        """Test malformed cursors are rejected with 400, not a server error"""
+
+        with pytest.raises(HTTPException) as exc_info:
+            _decode_task_cursor(cursor)
+        assert exc_info.value.status_code == 400
+
+
+class TestTaskPagination:
+    """Test paging through task lists by keyset"""
+
+    @pytest.mark.asyncio
+    async def test_pages_through_shared_created_at(self, task_sessions):
+        """Test rows with the same created_at are neither repeated nor skipped"""
+
+        # Seven tasks share a timestamp, so page boundaries fall inside the tie
+        created_ats = (
+            [SHARED_CREATED_AT - timedelta(minutes=1)] * 2
+            + [SHARED_CREATED_AT] * 7
+            + [SHARED_CREATED_AT + timedelta(minutes=1)]
+        )
+        await _insert_tasks(task_sessions, created_ats)
+
+        seen = []
+        after = None
+        for _ in range(len(created_ats)):
+            response = Response()
+            page = await _list_task_page(select(*TASK_LIST_COLUMNS), after, 3, response)
+            seen.extend(row["id"] for row in page)
+            after = response.headers.get(NEXT_CURSOR_HEADER)
+            if after is None:
+                break
+
+        # Newest first, ties broken by descending id
+        expected = sorted(
+            range(1, len(created_ats) + 1),
+            key=lambda task_id: (created_ats[task_id - 1], task_id),
+            reverse=True
+        )
+        assert seen == expected
+        assert len(set(seen)) == len(created_ats)
+
+    @pytest.mark.asyncio
+    async def test_last_page_has_no_cursor(self, task_sessions):
+        """Test a short page ends the listing"""
+
+        await _insert_tasks(task_sessions, [SHARED_CREATED_AT] * 2)
+
+        response = Response()
+        page = await _list_task_page(select(*TASK_LIST_COLUMNS), None, 3, response)
+        assert [row["id"] for row in page] == [2, 1]
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+    @pytest.mark.asyncio
+    async def test_malformed_cursor_rejected_before_query(self, task_sessions):
+        """Test a bad cursor on the list helper surfaces as a 400"""
+
+        with pytest.raises(HTTPException) as exc_info:
+            await _list_task_page(
+                select(*TASK_LIST_COLUMNS), "not a cursor!", 3, Response()
+            )
+        assert exc_info.value.status_code == 400
@@ -9,6 +9,7 @@ import pytest
 from pydantic import ValidationError
 from datetime import datetime
 import json
+import orjson
 
 from src.api.security.validation import (
     ResearchQueryValidator,
@@ -243,6 +244,17 @@ class TestErrorResponse:
         response = ErrorResponse.get("server_error", request_id)
         assert response["request_id"] == request_id
     
+    def test_precompiled_bytes_match_dict(self):
+        """Test serialized errors carry the same payload as get()"""
+        
+        for error_type, request_id in [
+            ("rate_limited", "req_123456"),
+            ("server_error", None),
+            ("unknown_error_type", "req_1")
+        ]:
+            payload = orjson.loads(ErrorResponse.get_bytes(error_type, request_id))
+            assert payload == ErrorResponse.get(error_type, request_id)
+    
     def test_http_status_mapping(self):
         """Test HTTP status code mapping"""
         
@@ -11,11 +11,16 @@ from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from datetime import datetime
 import json
 import uuid
+import zlib
 
 from fastapi import WebSocket
 from starlette.websockets import WebSocketState, WebSocketDisconnect
 
-from src.api.websocket_adk_enhanced import EnhancedADKWebSocketManager
+from src.api.websocket_adk_enhanced import (
+    EnhancedADKWebSocketManager,
+    BATCHED_SUBPROTOCOL,
+    COMPRESSED_SUBPROTOCOL
+)
 from src.api.middleware.rate_limiter import WebSocketRateLimiter
 from src.api.security.validation import WebSocketMessageValidator
 
@@ -23,20 +28,40 @@ from src.api.security.validation import WebSocketMessageValidator
 class MockWebSocket:
     """Mock WebSocket for testing"""
     
-    def __init__(self):
+    def __init__(self, subprotocols=()):
+        self.scope = {"subprotocols": list(subprotocols)}
         self.client_state = WebSocketState.CONNECTED
         self.messages_sent = []
+        self.frames_sent = []
         self.close_code = None
         self.close_reason = None
         self.accepted = False
+        self.subprotocol = None
         
-    async def accept(self):
+    async def accept(self, subprotocol=None):
         self.accepted = True
+        self.subprotocol = subprotocol
         
     async def send_json(self, data):
         if self.client_state != WebSocketState.CONNECTED:
             raise RuntimeError("WebSocket not connected")
         self.messages_sent.append(data)
+    
+    async def send_text(self, data):
+        if self.client_state != WebSocketState.CONNECTED:
+            raise RuntimeError("WebSocket not connected")
+        self.frames_sent.append(data)
+        decoded = json.loads(data)
+        if isinstance(decoded, list):
+            self.messages_sent.extend(decoded)
+        else:
+            self.messages_sent.append(decoded)
+    
+    async def send_bytes(self, data):
+        if self.client_state != WebSocketState.CONNECTED:
+            raise RuntimeError("WebSocket not connected")
+        self.frames_sent.append(data)
+        self.messages_sent.append(json.loads(zlib.decompress(data)))
         
     async def receive_json(self):
         # Mock receiving data
@@ -48,6 +73,24 @@ class MockWebSocket:
         self.close_reason = reason
 
 
+async def drain(manager, session_id):
+    """Wait until the session's writer task has sent everything queued"""
+    out_queue = manager.connection_metadata[session_id]['out_queue']
+    await asyncio.wait_for(out_queue.join(), timeout=1)
+
+
+def attach_session(manager, ws, session_id, **metadata):
+    """Register session metadata with a running writer, as connect() does"""
+    out_queue = asyncio.Queue()
+    writer = asyncio.create_task(manager._write_outbound(ws, out_queue, None))
+    manager.connection_metadata[session_id] = {
+        'compressed': False,
+        'out_queue': out_queue,
+        'writer': writer,
+        **metadata
+    }
+
+
 class TestEnhancedWebSocketManager:
     """Test enhanced WebSocket manager functionality"""
     
@@ -90,6 +133,7 @@ class TestEnhancedWebSocketManager:
         
         assert session_id is not None
         assert mock_websocket.accepted
+        await drain(ws_manager, session_id)
         assert len(mock_websocket.messages_sent) == 1
         
         # Check connection message
@@ -178,6 +222,7 @@ class TestEnhancedWebSocketManager:
             )
             
             await ws_manager.handle_message(mock_websocket, session_id, message)
+            await drain(ws_manager, session_id)
             
             # Should create task
             ws_manager.state_manager.create_research_task.assert_called_once()
@@ -204,6 +249,7 @@ class TestEnhancedWebSocketManager:
         }
         
         await ws_manager.handle_message(mock_websocket, session_id, message)
+        await drain(ws_manager, session_id)
         
         # Should send error
         error_sent = False
@@ -245,6 +291,7 @@ class TestEnhancedWebSocketManager:
             )
             
             await ws_manager.handle_message(mock_websocket, session_id, message)
+            await drain(ws_manager, session_id)
             
             # Check for rate limit error
             rate_limit_error = False
@@ -263,6 +310,7 @@ class TestEnhancedWebSocketManager:
         for tier in tiers:
             ws = MockWebSocket()
             session_id = await ws_manager.connect(ws, f"user_{tier}", tier)
+            await drain(ws_manager, session_id)
             
             # Check features in connection message
             msg = ws.messages_sent[0]
@@ -281,6 +329,40 @@ class TestEnhancedWebSocketManager:
                 assert features["max_queries_hour"] == 1000
                 assert features["voice_input"] is True
                 assert "custom" in features["export_formats"]
+    
+    @pytest.mark.asyncio
+    async def test_outbound_framing_per_subprotocol(self, ws_manager):
+        """Test every message uses the framing negotiated at connect"""
+        
+        plain = MockWebSocket()
+        batched = MockWebSocket(subprotocols=[BATCHED_SUBPROTOCOL])
+        compressed = MockWebSocket(subprotocols=[COMPRESSED_SUBPROTOCOL])
+        
+        sessions = {}
+        for ws in (plain, batched, compressed):
+            session_id = await ws_manager.connect(ws, "user123", "free")
+            await ws_manager.handle_message(ws, session_id, {"type": "ping"})
+            await ws_manager.broadcast({"type": "agent_health", "status": "degraded"})
+            sessions[session_id] = ws
+        for session_id in sessions:
+            await drain(ws_manager, session_id)
+        
+        # Without a subprotocol each frame is a single JSON object
+        assert plain.subprotocol is None
+        assert all(isinstance(json.loads(f), dict) for f in plain.frames_sent)
+        
+        # Batching peers only ever receive JSON arrays
+        assert batched.subprotocol == BATCHED_SUBPROTOCOL
+        assert all(isinstance(json.loads(f), list) for f in batched.frames_sent)
+        
+        # Compressed peers receive one zlib frame per message
+        assert compressed.subprotocol == COMPRESSED_SUBPROTOCOL
+        assert all(isinstance(f, bytes) for f in compressed.frames_sent)
+        
+        for ws in (plain, batched, compressed):
+            types = [msg["type"] for msg in ws.messages_sent]
+            assert types[:2] == ["connection_established", "pong"]
+            assert "agent_health" in types
 
 
 class TestResearchProcessing:
@@ -339,10 +421,7 @@ class TestResearchProcessing:
         
         # Setup connection metadata
         session_id = str(uuid.uuid4())
-        manager.connection_metadata[session_id] = {
-            'user_id': 'user123',
-            'user_tier': 'pro'
-        }
+        attach_session(manager, ws, session_id, user_id='user123', user_tier='pro')
         
         # Process research
         from src.api.security.validation import ResearchQueryValidator
@@ -352,6 +431,7 @@ class TestResearchProcessing:
         )
         
         await manager._process_research(ws, session_id, "task_123", query)
+        await drain(manager, session_id)
         
         # Verify progress updates
         assert manager.state_manager.update_task_progress.call_count >= 4
@@ -384,15 +464,13 @@ class TestResearchProcessing:
         manager.adk.stream_research = error_stream
         
         session_id = str(uuid.uuid4())
-        manager.connection_metadata[session_id] = {
-            'user_id': 'user123',
-            'user_tier': 'free'
-        }
+        attach_session(manager, ws, session_id, user_id='user123', user_tier='free')
         
         from src.api.security.validation import ResearchQueryValidator
         query = ResearchQueryValidator(query="Test")
         
         await manager._process_research(ws, session_id, "task_456", query)
+        await drain(manager, session_id)
         
         # Should update task as error
         manager.state_manager.update_task_progress.assert_called_with(
@@ -532,6 +610,7 @@ class TestWebSocketSecurity:
         }
         
         await manager.handle_message(ws, session_id, injection_message)
+        await drain(manager, session_id)
         
         # Should receive error, not process query
         error_found = False
@@ -574,6 +653,7 @@ class TestWebSocketSecurity:
         
         # Original connection should still work
         await manager.handle_message(ws1, session_id, {"type": "ping"})
+        await drain(manager, session_id)
         
         # Check ws1 received pong
         pong_found = any(